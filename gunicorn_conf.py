@@ -0,0 +1,26 @@
+"""
+Конфигурация gunicorn для push_analytic
+
+Запуск: gunicorn -c gunicorn_conf.py run_app:app
+"""
+
+import os
+
+# Потоковые воркеры: psycopg2 отпускает GIL на время ожидания ответа БД,
+# поэтому долгие запросы (/export/csv) не блокируют остальные потоки процесса.
+# gevent не используется: psycopg2 без psycogreen блокировал бы весь hub.
+worker_class = 'gthread'
+
+# Каждый процесс держит свой пул соединений (до PGPOOL_MAX),
+# поэтому число процессов ограничено по умолчанию
+workers = int(os.getenv('GUNICORN_WORKERS', 2))
+threads = int(os.getenv('GUNICORN_THREADS', 8))
+
+bind = f"0.0.0.0:{os.getenv('FLASK_PORT', 5000)}"
+timeout = 120
+keepalive = 5
+
+# Логи запросов gunicorn пишет в stdout/stderr контейнера
+accesslog = os.getenv('GUNICORN_ACCESS_LOG') or None
+errorlog = '-'
+loglevel = os.getenv('LOG_LEVEL', 'INFO').lower()
@@ -4,17 +4,13 @@
 
 import os
 import sys
-from flask import Flask
-from flask_cors import CORS
 
 # Добавляем src в путь
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
+# CORS (список разрешенных origin) настраивается в самом приложении (src/api/notification_api.py)
 from src.api.notification_api import app
 
-# Настраиваем CORS для фронтенда на порту 5555
-CORS(app, origins=["http://188.244.115.175:5555", "http://localhost:5555"])
-
 if __name__ == "__main__":
     port = int(os.getenv('FLASK_PORT', 5000))
     debug = os.getenv('FLASK_ENV', 'production') == 'development'
@@ -2,118 +2,245 @@
 Анализатор клиентов с использованием сценариев
 """
 
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Callable, Optional
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from functools import lru_cache, partial
+from operator import itemgetter
+import heapq
+import logging
+import threading
 import time
-from ..products import (
-    TravelCardScenario, PremiumCardScenario, CreditCardScenario,
-    CurrencyExchangeScenario, MultiCurrencyDepositScenario,
-    SavingsDepositScenario, AccumulationDepositScenario,
-    InvestmentsScenario, GoldBarsScenario, CashCreditScenario
-)
+from ..products.registry import SCENARIO_KEYS, get_scenarios
+from ..notifications.notification_ai import PRIORITY_RANK
+from ..notifications.scenario_integration import ScenarioIntegration
+from ..products.client_snapshot import CachingDatabaseManager
 
 
-def analyze_client_with_scenarios(client_code: str, days: int, db_manager) -> List[Dict[str, Any]]:
-    """Анализ клиента с использованием всех сценариев"""
-    from ..notifications.scenario_integration import ScenarioIntegration
+logger = logging.getLogger(__name__)
+
+
+# Самые популярные продукты для быстрого анализа
+FAST_SCENARIO_KEYS = ('travel_card', 'credit_card', 'investments', 'premium_card', 'cash_credit')
+
+_sort_key = itemgetter('_sort_key')
+
+# Максимальное время работы одного сценария (секунды, от начала выполнения задачи)
+ANALYSIS_TIMEOUT = 15
+
+# Максимальное ожидание свободного потока пула сценариев (секунды)
+ANALYSIS_QUEUE_TIMEOUT = 15
+
+# Пул для параллельного запуска сценариев одного клиента
+_scenario_executor = ThreadPoolExecutor(max_workers=len(SCENARIO_KEYS),
+                                        thread_name_prefix='scenario')
+
+
+class PartialAnalysis(list):
+    """
+    Уведомления анализа, в котором часть сценариев не уложилась в таймаут
+    
+    Такой результат возвращается клиенту, но не кешируется.
+    """
+
+
+class _ScenarioTask:
+    """Задача сценария с отметкой времени начала выполнения"""
+    
+    def __init__(self):
+        self.started = threading.Event()
+        self.started_at = 0.0
     
-    print(f"🔍 Анализ клиента {client_code} за {days} дней")
+    def __call__(self, *args) -> Dict[str, Any]:
+        self.started_at = time.monotonic()
+        self.started.set()
+        return _run_scenario(*args)
+
+
+@lru_cache(maxsize=1)
+def get_integration():
+    """Общий экземпляр ScenarioIntegration (не хранит состояния между вызовами)"""
+    return ScenarioIntegration()
+
+
+def analyze_client_with_scenarios(client_code: str, days: int, db_manager,
+                                  integration=None, top_k: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Анализ клиента с использованием всех сценариев
+    
+    Если задан top_k, возвращаются только top_k лучших уведомлений
+    (частичный отбор через heapq вместо полной сортировки).
+    
+    Если сценарий не уложился в ANALYSIS_TIMEOUT, возвращается
+    PartialAnalysis без его уведомления. Брошенная задача дорабатывает
+    в фоне на собственном соединении с БД (см. acquire_worker).
+    """
+    logger.debug("Анализ клиента %s за %s дней", client_code, days)
     start_time = time.time()
     
     try:
-        integration = ScenarioIntegration()
+        if integration is None:
+            integration = get_integration()
         notifications = []
-    except Exception as e:
-        print(f"❌ Ошибка инициализации ScenarioIntegration: {e}")
+    except Exception:
+        logger.exception("Ошибка инициализации ScenarioIntegration")
         return []
     
-    try:
-        scenarios = {
-            'travel_card': TravelCardScenario(),
-            'premium_card': PremiumCardScenario(),
-            'credit_card': CreditCardScenario(),
-            'currency_exchange': CurrencyExchangeScenario(),
-            'multi_currency_deposit': MultiCurrencyDepositScenario(),
-            'savings_deposit': SavingsDepositScenario(),
-            'accumulation_deposit': AccumulationDepositScenario(),
-            'investments': InvestmentsScenario(),
-            'gold_bars': GoldBarsScenario(),
-            'cash_credit': CashCreditScenario()
-        }
-    except Exception as e:
-        print(f"❌ Ошибка создания сценариев: {e}")
+    # Данные клиента запрашиваются из БД один раз на все сценарии
+    db_manager = CachingDatabaseManager(db_manager)
+    db_manager.prefetch(client_code, days)
+    
+    # Неизвестный клиент: сценарии вернули бы нулевой скор
+    client_info = db_manager.get_client_by_code(client_code)
+    if not client_info:
+        logger.debug("Клиент %s не найден", client_code)
         return []
     
-    print(f"📊 Анализируем {len(scenarios)} продуктов...")
+    # Отсекаем сценарии, заведомо не подходящие клиенту
+    scenarios = get_scenarios()
+    product_keys = [key for key in SCENARIO_KEYS if scenarios[key].is_applicable(client_info)]
+    if not product_keys:
+        logger.debug("Нет применимых продуктов для клиента %s", client_code)
+        return []
+    
+    logger.debug("Анализируем %d продуктов", len(product_keys))
+    
+    # Запускаем все сценарии параллельно
+    tasks = []
+    for product_key in product_keys:
+        task = _ScenarioTask()
+        future = _scenario_executor.submit(
+            task, product_key, client_code, days, db_manager, integration
+        )
+        tasks.append((product_key, task, future))
     
-    for product_key, scenario in scenarios.items():
+    # Собираем результаты в исходном порядке продуктов; время сценария
+    # отсчитывается от начала его выполнения, а не от постановки в очередь
+    queue_deadline = time.monotonic() + ANALYSIS_QUEUE_TIMEOUT
+    timed_out = False
+    for product_key, task, future in tasks:
+        if not task.started.wait(max(queue_deadline - time.monotonic(), 0)) and future.cancel():
+            logger.warning("Сценарий %s не дождался свободного потока", product_key)
+            timed_out = True
+            continue
+        
+        task.started.wait()
         try:
-            # Проверяем таймаут (максимум 15 секунд)
-            if time.time() - start_time > 15:
-                print(f"⏰ Таймаут, завершаем с {len(notifications)} продуктами")
-                break
-                
-            # Анализируем клиента
-            scenario_result = scenario.analyze_client(client_code, days, db_manager)
-            client_data = scenario.get_client_data(client_code, days, db_manager)
-            
-            # Генерируем уведомление
-            notification = integration.generate_notification_from_scenario(
-                client_data, scenario_result, scenario.product_name
+            notification = future.result(
+                timeout=max(task.started_at + ANALYSIS_TIMEOUT - time.monotonic(), 0)
             )
-            
-            notification.update({
-                'client_code': client_code,
-                'product_key': product_key,
-                'analysis_score': scenario_result.get('score', 0),
-                'expected_benefit': scenario_result.get('expected_benefit', 0)
-            })
-            
-            notifications.append(notification)
-            
-        except Exception as e:
-            print(f"❌ {product_key}: {e}")
+        except FutureTimeoutError:
+            logger.warning("Таймаут анализа продукта %s", product_key)
+            timed_out = True
+            continue
+        except Exception:
+            logger.exception("Ошибка анализа продукта %s", product_key)
             # Продолжаем анализ других продуктов
             continue
+        
+        notifications.append(notification)
     
-    print(f"🔄 Обработано: {len(notifications)} продуктов")
+    logger.debug("Обработано: %d продуктов", len(notifications))
     
     # Сортируем по приоритету и скорингу
     try:
-        notifications.sort(key=lambda x: (x.get('priority', 'low'), x.get('analysis_score', 0)), reverse=True)
-    except Exception as e:
-        print(f"❌ Ошибка сортировки: {e}")
+        if top_k is None:
+            notifications.sort(key=_sort_key, reverse=True)
+        else:
+            notifications = heapq.nlargest(top_k, notifications, key=_sort_key)
+    except Exception:
+        logger.exception("Ошибка сортировки уведомлений")
+    
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Топ-3: %s", [n.get('product_name', 'Unknown') for n in notifications[:3]])
     
-    print(f"🏆 Топ-3: {[n.get('product_name', 'Unknown') for n in notifications[:3]]}")
+    if timed_out:
+        return PartialAnalysis(notifications)
     
     if not notifications:
         return []
     
-    print(f"✅ Завершено за {time.time() - start_time:.1f}с")
+    logger.debug("Анализ клиента %s завершен за %.1fс", client_code, time.time() - start_time)
     return notifications
 
 
+def _run_scenario(product_key: str, client_code: str, days: int, db_manager,
+                  integration) -> Dict[str, Any]:
+    """Анализ клиента одним сценарием и генерация уведомления"""
+    scenario = get_scenarios()[product_key]
+    scenario.reset()
+    
+    # Анализируем клиента (у задачи свое соединение с БД)
+    worker_db = db_manager.acquire_worker()
+    try:
+        scenario_result = scenario.analyze_client(client_code, days, worker_db)
+        client_data = scenario.get_client_data(client_code, days, worker_db)
+    finally:
+        db_manager.release_worker(worker_db)
+    
+    # Генерируем уведомление
+    notification = integration.generate_notification_from_scenario(
+        client_data, scenario_result, scenario.product_name
+    )
+    
+    notification.update({
+        'client_code': client_code,
+        'product_key': product_key,
+        'analysis_score': scenario_result.get('score', 0),
+        'expected_benefit': scenario_result.get('expected_benefit', 0)
+    })
+    
+    # Ключ сортировки считается один раз: (ранг приоритета, скор)
+    notification['_sort_key'] = (
+        PRIORITY_RANK.get(notification.get('priority', 'low'), 0),
+        notification['analysis_score']
+    )
+    
+    return notification
+
+
+def make_analyzer(days: int, integration=None) -> Callable[..., List[Dict[str, Any]]]:
+    """
+    Создать анализатор, специализированный под фиксированный период
+    
+    ScenarioIntegration выбирается один раз при сборке анализатора,
+    а не на каждый запрос.
+    
+    Args:
+        days: Период анализа в днях
+        integration: Готовый экземпляр ScenarioIntegration (опционально)
+    
+    Returns:
+        Функция analyze(client_code, db_manager=..., top_k=None) -> список уведомлений
+    """
+    if integration is None:
+        integration = get_integration()
+    
+    return partial(analyze_client_with_scenarios, days=days, integration=integration)
+
+
 def analyze_client_fast(client_code: str, days: int, db_manager) -> List[Dict[str, Any]]:
     """Быстрый анализ клиента - только топ-5 продуктов"""
-    from ..notifications.scenario_integration import ScenarioIntegration
-    
-    print(f"🚀 Быстрый анализ клиента {client_code}")
+    logger.debug("Быстрый анализ клиента %s", client_code)
     
     try:
-        integration = ScenarioIntegration()
+        integration = get_integration()
         notifications = []
+        db_manager = CachingDatabaseManager(db_manager)
+        db_manager.prefetch(client_code, days)
         
         # Анализируем только самые популярные продукты
-        scenarios = {
-            'travel_card': TravelCardScenario(),
-            'credit_card': CreditCardScenario(),
-            'investments': InvestmentsScenario(),
-            'premium_card': PremiumCardScenario(),
-            'cash_credit': CashCreditScenario()
-        }
+        all_scenarios = get_scenarios()
+        client_info = db_manager.get_client_by_code(client_code)
+        if not client_info:
+            logger.debug("Клиент %s не найден", client_code)
+            return []
         
-        for product_key, scenario in scenarios.items():
+        for product_key in FAST_SCENARIO_KEYS:
+            scenario = all_scenarios[product_key]
+            if not scenario.is_applicable(client_info):
+                continue
             try:
-                print(f"🔍 {product_key}...", end=" ")
+                scenario.reset()
                 
                 # Анализируем клиента
                 scenario_result = scenario.analyze_client(client_code, days, db_manager)
@@ -132,18 +259,17 @@ def analyze_client_fast(client_code: str, days: int, db_manager) -> List[Dict[st
                 })
                 
                 notifications.append(notification)
-                print(f"✅")
                 
-            except Exception as e:
-                print(f"❌ {e}")
+            except Exception:
+                logger.exception("Ошибка анализа продукта %s", product_key)
                 continue
         
         # Сортируем по скорингу
         notifications.sort(key=lambda x: x.get('analysis_score', 0), reverse=True)
         
-        print(f"🚀 Быстрый анализ завершен: {len(notifications)} уведомлений")
+        logger.debug("Быстрый анализ клиента %s завершен: %d уведомлений", client_code, len(notifications))
         return notifications
         
-    except Exception as e:
-        print(f"❌ Ошибка быстрого анализа: {e}")
+    except Exception:
+        logger.exception("Ошибка быстрого анализа клиента %s", client_code)
         return []
@@ -2,57 +2,278 @@
 Менеджеры базы данных для API
 """
 
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Iterable, Optional, Sequence
+from collections import defaultdict
+import csv
+import io
+import logging
+import random
+import re
+import threading
+import time
 import psycopg2
+from psycopg2 import sql
+from psycopg2.extensions import connection as PgConnection
+from psycopg2.pool import ThreadedConnectionPool
 from ..config.database import db_config
 
 
+logger = logging.getLogger(__name__)
+
+# Таблица, из которой читает запрос (первый FROM)
+_QUERY_TABLE_RE = re.compile(r'FROM\s+"(\w+)"')
+
+# Разобранные шаблоны запросов: текст запроса -> имя таблицы
+_query_tables: Dict[str, Optional[str]] = {}
+
+
+def _query_table(query: str) -> Optional[str]:
+    """Имя таблицы запроса (шаблон разбирается один раз)"""
+    try:
+        return _query_tables[query]
+    except KeyError:
+        match = _QUERY_TABLE_RE.search(query)
+        table = match.group(1) if match else None
+        _query_tables[query] = table
+        return table
+
+
+# Строковые литералы SQL (плейсхолдеры внутри них подготовить нельзя)
+_SQL_LITERAL_RE = re.compile(r"'[^']*'")
+
+# Текст запроса -> текст для PREPARE ($1, $2, ...) или None, если запрос не подготавливается
+_prepared_texts: Dict[str, Optional[str]] = {}
+
+
+def _prepared_text(query: str) -> Optional[str]:
+    """Текст запроса для PREPARE (шаблон разбирается один раз)"""
+    try:
+        return _prepared_texts[query]
+    except KeyError:
+        text = None
+        placeholders = query.count('%s')
+        if '%%' not in query and '%(' not in query and \
+                _SQL_LITERAL_RE.sub('', query).count('%s') == placeholders:
+            parts = query.split('%s')
+            text = parts[0] + ''.join(f'${i}{part}' for i, part in enumerate(parts[1:], 1))
+        _prepared_texts[query] = text
+        return text
+
+
+class PreparingConnection(PgConnection):
+    """Соединение psycopg2, запоминающее подготовленные на нем запросы"""
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Текст запроса -> имя подготовленного запроса
+        self.prepared: Dict[str, str] = {}
+
+
+# Клиент, его транзакции и переводы за период одним запросом
+# (строки - JSON-массивы в порядке запросов сценариев)
+CLIENT_BUNDLE_QUERY = """
+    WITH c AS (
+        SELECT client_code, name, status, avg_monthly_balance_KZT, city, age
+        FROM "Clients"
+        WHERE client_code = %(client_code)s
+    )
+    SELECT
+        c.client_code, c.name, c.status, c.avg_monthly_balance_KZT, c.city, c.age,
+        (
+            SELECT COALESCE(json_agg(t ORDER BY t.date DESC), '[]')
+            FROM (
+                SELECT tx.*, c.name AS client_name
+                FROM "Transactions" tx
+                WHERE tx.client_code = c.client_code
+                AND tx.date >= CURRENT_DATE - %(days)s * INTERVAL '1 day'
+            ) t
+        ),
+        (
+            SELECT COALESCE(json_agg(tr ORDER BY tr.date DESC), '[]')
+            FROM (
+                SELECT tf.*, c.name AS client_name
+                FROM "Transfers" tf
+                WHERE tf.client_code = c.client_code
+                AND tf.date >= CURRENT_DATE - %(days)s * INTERVAL '1 day'
+            ) tr
+        )
+    FROM c
+"""
+
+
+# Пакетная загрузка данных нескольких клиентов (параметры: список кодов[, days])
+CLIENTS_BY_CODES_QUERY = """
+    SELECT client_code, name, status, avg_monthly_balance_KZT, city, age
+    FROM "Clients"
+    WHERE client_code = ANY(%s)
+"""
+
+TRANSACTIONS_BY_CODES_QUERY = """
+    SELECT t.*, c.name as client_name
+    FROM "Transactions" t
+    JOIN "Clients" c ON t.client_code = c.client_code
+    WHERE t.client_code = ANY(%s)
+    AND t.date >= CURRENT_DATE - %s * INTERVAL '1 day'
+    ORDER BY t.date DESC
+"""
+
+TRANSFERS_BY_CODES_QUERY = """
+    SELECT tr.*, c.name as client_name
+    FROM "Transfers" tr
+    JOIN "Clients" c ON tr.client_code = c.client_code
+    WHERE tr.client_code = ANY(%s)
+    AND tr.date >= CURRENT_DATE - %s * INTERVAL '1 day'
+    ORDER BY tr.date DESC
+"""
+
+
+def _rows_as_dicts(cursor) -> List[Dict]:
+    """Строки результата последнего запроса курсора в виде словарей"""
+    # Получаем названия колонок
+    columns = tuple(desc[0] for desc in cursor.description)
+    
+    # Преобразуем результаты в список словарей (zip + dict работают на уровне C);
+    # строки читаются итерацией курсора, без промежуточного списка кортежей
+    return [dict(zip(columns, row)) for row in cursor]
+
+
+def _client_info_from_row(row: Sequence[Any]) -> Dict:
+    """Данные клиента из строки (client_code, name, status, баланс, city, age)"""
+    return {
+        'client_code': row[0],
+        'name': row[1],
+        'status': row[2],
+        'avg_monthly_balance_KZT': float(row[3]) if row[3] else 0,
+        'city': row[4] or 'Алматы',
+        'age': row[5] or 30
+    }
+
+
+# Границы id в таблице Clients для выбора случайного клиента: (min, max, время загрузки)
+_client_id_range: Optional[tuple] = None
+
+# Как долго границы id считаются актуальными (секунды)
+CLIENT_ID_RANGE_TTL = 300
+
+# Пул соединений процесса (создается при первом обращении к БД)
+_pool: Optional[ThreadedConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ThreadedConnectionPool:
+    """
+    Общий пул соединений с БД
+    
+    Соединения открываются по строке подключения конфигурации
+    (DATABASE_URL, если задана), как и в init_database.py.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadedConnectionPool(
+                    db_config.pool_minconn,
+                    db_config.pool_maxconn,
+                    db_config.get_connection_string(),
+                    connection_factory=PreparingConnection
+                )
+    return _pool
+
+
 class MockDatabaseManager:
     """Мок-менеджер базы данных для тестирования"""
     
     def __init__(self, client_info: Dict, transactions: List[Dict], transfers: List[Dict]):
         self.client_info = client_info
+        # client_code в БД - строка (VARCHAR), поэтому коды сравниваются как строки
+        self._code = str(client_info['client_code'])
         self.transactions = transactions
         self.transfers = transfers
+        self._tables = {'Transactions': transactions, 'Transfers': transfers}
+    
+    def acquire_worker(self) -> 'MockDatabaseManager':
+        """Менеджер для параллельной задачи (данные в памяти разделяются)"""
+        return self
+    
+    def release_worker(self, worker: 'MockDatabaseManager'):
+        """Освободить менеджер параллельной задачи"""
     
     def get_client_by_code(self, client_code: str) -> Dict:
         """Получить данные клиента"""
-        if str(self.client_info['client_code']) == str(client_code):
+        if str(client_code) == self._code:
             return self.client_info
         return {}
     
     def execute_query(self, query: str, params: tuple) -> List[Dict]:
         """Выполнить SQL запрос"""
-        if 'Transactions' in query:
-            return self.transactions
-        elif 'Transfers' in query:
-            return self.transfers
-        return []
+        return self._tables.get(_query_table(query), [])
 
 
 class RealDatabaseManager:
-    """Реальный менеджер базы данных для работы с Neon DB"""
+    """
+    Реальный менеджер базы данных для работы с Neon DB
+    
+    Соединение берется из общего пула и возвращается в него в close().
+    Используйте как контекстный менеджер, чтобы соединение вернулось
+    в пул и при исключении:
+    
+        with RealDatabaseManager() as db_manager:
+            ...
+    """
     
     def __init__(self):
         self.connection = None
+        self._pooled = False
         self.connect()
     
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
     def connect(self):
-        """Подключение к базе данных"""
+        """Получение соединения из пула"""
+        try:
+            self.connection = get_pool().getconn()
+            self._pooled = True
+            logger.debug("Соединение с БД получено из пула")
+        except Exception:
+            logger.exception("Ошибка подключения к БД")
+            self.connection = None
+    
+    def connect_direct(self):
+        """Отдельное соединение вне пула (закрывается в close())"""
         try:
             self.connection = psycopg2.connect(
-                host=db_config.host,
-                port=db_config.port,
-                database=db_config.database,
-                user=db_config.user,
-                password=db_config.password,
-                sslmode=db_config.sslmode
+                db_config.get_connection_string(),
+                connection_factory=PreparingConnection
             )
-            print("✅ Подключение к базе данных установлено")
-        except Exception as e:
-            print(f"❌ Ошибка подключения к БД: {e}")
+            self._pooled = False
+            logger.debug("Открыто соединение с БД вне пула")
+        except Exception:
+            logger.exception("Ошибка подключения к БД")
             self.connection = None
     
+    def acquire_worker(self) -> 'RealDatabaseManager':
+        """
+        Менеджер с собственным соединением для параллельной задачи
+        
+        Запросы через одно соединение psycopg2 выполняются по очереди,
+        поэтому каждой задаче выдается отдельное соединение из пула.
+        Если пул исчерпан, открывается соединение вне пула: задача,
+        брошенная по таймауту, не должна работать через соединение
+        текущего менеджера после его возврата в пул.
+        """
+        worker = RealDatabaseManager()
+        if worker.connection is None:
+            worker.connect_direct()
+        return worker
+    
+    def release_worker(self, worker: 'RealDatabaseManager'):
+        """Вернуть соединение параллельной задачи в пул"""
+        worker.close()
+    
     def get_client_by_code(self, client_code: str) -> Dict:
         """Получить данные клиента из БД"""
         if not self.connection:
@@ -68,19 +289,74 @@ class RealDatabaseManager:
                 
                 result = cursor.fetchone()
                 if result:
-                    return {
-                        'client_code': result[0],
-                        'name': result[1],
-                        'status': result[2],
-                        'avg_monthly_balance_KZT': float(result[3]) if result[3] else 0,
-                        'city': result[4] or 'Алматы',
-                        'age': result[5] or 30
-                    }
+                    return _client_info_from_row(result)
                 return {}
-        except Exception as e:
-            print(f"Ошибка получения клиента: {e}")
+        except Exception:
+            logger.exception("Ошибка получения клиента %s", client_code)
             return {}
     
+    def fetch_client_bundles(self, client_codes: Sequence[str], days: int) -> Optional[Dict[str, tuple]]:
+        """
+        Данные нескольких клиентов тремя запросами (вместо запросов на каждого)
+        
+        Returns:
+            {код клиента: (client_info, transactions, transfers)} для найденных
+            клиентов; None при ошибке запроса
+        """
+        if not self.connection:
+            return None
+        
+        codes = [str(code) for code in client_codes]
+        try:
+            with self.connection.cursor() as cursor:
+                cursor.execute(CLIENTS_BY_CODES_QUERY, (codes,))
+                client_rows = cursor.fetchall()
+                
+                cursor.execute(TRANSACTIONS_BY_CODES_QUERY, (codes, days))
+                transactions = _rows_as_dicts(cursor)
+                
+                cursor.execute(TRANSFERS_BY_CODES_QUERY, (codes, days))
+                transfers = _rows_as_dicts(cursor)
+        except Exception:
+            logger.exception("Ошибка пакетной загрузки клиентов")
+            return None
+        
+        transactions_by_code = defaultdict(list)
+        for transaction in transactions:
+            transactions_by_code[str(transaction['client_code'])].append(transaction)
+        transfers_by_code = defaultdict(list)
+        for transfer in transfers:
+            transfers_by_code[str(transfer['client_code'])].append(transfer)
+        
+        bundles = {}
+        for row in client_rows:
+            code = str(row[0])
+            bundles[code] = (_client_info_from_row(row), transactions_by_code[code], transfers_by_code[code])
+        return bundles
+    
+    def fetch_client_bundle(self, client_code: str, days: int) -> Optional[tuple]:
+        """
+        Клиент, его транзакции и переводы за период за один запрос к БД
+        
+        Returns:
+            (client_info, transactions, transfers); client_info пустой,
+            если клиент не найден; None при ошибке запроса
+        """
+        if not self.connection:
+            return None
+        
+        try:
+            with self.connection.cursor() as cursor:
+                cursor.execute(CLIENT_BUNDLE_QUERY, {'client_code': client_code, 'days': days})
+                row = cursor.fetchone()
+        except Exception:
+            logger.exception("Ошибка получения данных клиента %s", client_code)
+            return None
+        
+        if row is None:
+            return {}, [], []
+        return _client_info_from_row(row), row[6], row[7]
+    
     def execute_query(self, query: str, params: tuple) -> List[Dict]:
         """Выполнить SQL запрос"""
         if not self.connection:
@@ -88,52 +364,138 @@ class RealDatabaseManager:
         
         try:
             with self.connection.cursor() as cursor:
-                cursor.execute(query, params)
-                
-                # Получаем названия колонок
-                columns = [desc[0] for desc in cursor.description]
-                
-                # Преобразуем результаты в список словарей
-                results = []
-                for row in cursor.fetchall():
-                    row_dict = {}
-                    for i, value in enumerate(row):
-                        row_dict[columns[i]] = value
-                    results.append(row_dict)
-                
-                return results
-        except Exception as e:
-            print(f"Ошибка выполнения запроса: {e}")
+                self._execute(cursor, query, params)
+                return _rows_as_dicts(cursor)
+        except Exception:
+            logger.exception("Ошибка выполнения запроса")
             return []
     
+    def _execute(self, cursor, query: str, params: tuple):
+        """
+        Выполнить запрос, при включенном PGPREPARE - через PREPARE/EXECUTE
+        
+        Запрос подготавливается на соединении один раз, дальше сервер
+        не разбирает и не планирует его заново. Запросы с плейсхолдерами
+        внутри строковых литералов выполняются как есть.
+        """
+        prepared = getattr(self.connection, 'prepared', None)
+        text = _prepared_text(query) if db_config.prepare_statements else None
+        if prepared is None or text is None:
+            cursor.execute(query, params)
+            return
+        
+        name = prepared.get(query)
+        if name is None:
+            name = f'stmt_{len(prepared)}'
+            cursor.execute(f'PREPARE {name} AS {text}')
+            prepared[query] = name
+        
+        if params:
+            cursor.execute(f"EXECUTE {name} ({', '.join(['%s'] * len(params))})", params)
+        else:
+            cursor.execute(f'EXECUTE {name}')
+    
+    def _get_client_id_range(self, cursor) -> Optional[tuple]:
+        """Границы id клиентов (кешируются на CLIENT_ID_RANGE_TTL секунд)"""
+        global _client_id_range
+        if _client_id_range is None or time.time() - _client_id_range[2] > CLIENT_ID_RANGE_TTL:
+            cursor.execute('SELECT MIN(id), MAX(id) FROM "Clients"')
+            min_id, max_id = cursor.fetchone()
+            if min_id is None:
+                return None
+            _client_id_range = (min_id, max_id, time.time())
+        return _client_id_range[:2]
+    
     def get_random_client_code(self) -> str:
-        """Получить случайный код клиента из БД"""
+        """
+        Получить случайный код клиента из БД
+        
+        Вместо ORDER BY RANDOM() (сортировка всей таблицы) выбирается
+        случайный id в известных границах и ближайший клиент по индексу
+        первичного ключа.
+        """
         if not self.connection:
-            print("❌ Нет подключения к БД")
+            logger.error("Нет подключения к БД")
             return None
         
         try:
             with self.connection.cursor() as cursor:
+                id_range = self._get_client_id_range(cursor)
+                if id_range is None:
+                    logger.warning("Клиенты не найдены в БД")
+                    return None
+                
                 cursor.execute("""
                     SELECT client_code 
                     FROM "Clients" 
-                    ORDER BY RANDOM() 
+                    WHERE id >= %s 
+                    ORDER BY id 
                     LIMIT 1
-                """)
+                """, (random.randint(*id_range),))
                 
                 result = cursor.fetchone()
+                if result is None:
+                    # Границы устарели (клиенты удалены) - берем первого клиента
+                    cursor.execute('SELECT client_code FROM "Clients" ORDER BY id LIMIT 1')
+                    result = cursor.fetchone()
                 if result and result[0]:
                     client_code = str(result[0])
-                    print(f"✅ Найден случайный клиент: {client_code}")
+                    logger.debug("Найден случайный клиент: %s", client_code)
                     return client_code
                 else:
-                    print("❌ Клиенты не найдены в БД")
+                    logger.warning("Клиенты не найдены в БД")
                     return None
-        except Exception as e:
-            print(f"❌ Ошибка получения случайного клиента: {e}")
+        except Exception:
+            logger.exception("Ошибка получения случайного клиента")
             return None
     
+    def bulk_insert(self, table: str, columns: Sequence[str], rows: Iterable[Sequence[Any]]) -> int:
+        """
+        Массовая вставка строк через COPY ... FROM STDIN
+        
+        Один COPY вместо INSERT на каждую строку: данные уходят на сервер
+        одним потоком без разбора отдельных запросов.
+        
+        Args:
+            table: Имя таблицы (например, "Transactions")
+            columns: Список колонок в порядке значений строк
+            rows: Строки для вставки (None записывается как NULL)
+        
+        Returns:
+            Количество вставленных строк (0 при ошибке)
+        """
+        if not self.connection:
+            return 0
+        
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        count = 0
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+        buffer.seek(0)
+        
+        query = sql.SQL("COPY {} ({}) FROM STDIN WITH (FORMAT csv)").format(
+            sql.Identifier(table),
+            sql.SQL(', ').join(map(sql.Identifier, columns))
+        )
+        
+        try:
+            with self.connection.cursor() as cursor:
+                cursor.copy_expert(query.as_string(cursor), buffer)
+            self.connection.commit()
+            return count
+        except Exception:
+            self.connection.rollback()
+            logger.exception("Ошибка массовой вставки в %s", table)
+            return 0
+    
     def close(self):
-        """Закрыть соединение с БД"""
-        if self.connection:
+        """Вернуть соединение в пул (разорванное соединение пул закрывает)"""
+        if not self.connection:
+            return
+        if self._pooled:
+            get_pool().putconn(self.connection, close=bool(self.connection.closed))
+        else:
             self.connection.close()
+        self.connection = None
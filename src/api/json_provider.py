@@ -0,0 +1,58 @@
+"""
+Быстрая JSON-сериализация ответов API на базе orjson
+"""
+
+from decimal import Decimal
+from typing import Any, Iterable, Iterator
+
+import orjson
+from flask import make_response
+from flask.json.provider import JSONProvider
+
+
+def _default(obj: Any) -> Any:
+    """Сериализация типов, которые orjson не поддерживает (Decimal из psycopg2)"""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps_bytes(obj: Any) -> bytes:
+    """Сериализовать объект в JSON-байты"""
+    return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class OrjsonProvider(JSONProvider):
+    """JSON-провайдер Flask на базе orjson"""
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return dumps_bytes(obj).decode()
+
+    def loads(self, s: str | bytes, **kwargs: Any) -> Any:
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps_bytes(obj), mimetype='application/json')
+
+
+def iter_json_object(fields: dict, list_key: str, items: Iterable[Any]) -> Iterator[bytes]:
+    """
+    Потоковая сериализация объекта {**fields, list_key: [*items]}
+
+    Элементы списка сериализуются по одному, без сборки всего ответа в памяти.
+    """
+    head = dumps_bytes({**fields, list_key: []})
+    yield head[:-2]
+    separator = b''
+    for item in items:
+        yield separator + dumps_bytes(item)
+        separator = b','
+    yield b']}'
+
+
+def output_json(data: Any, code: int, headers=None):
+    """Представление application/json для flask-restx (вместо stdlib json)"""
+    response = make_response(dumps_bytes(data), code)
+    response.headers.extend(headers or {})
+    return response
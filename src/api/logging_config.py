@@ -0,0 +1,49 @@
+"""
+Настройка логирования API
+"""
+
+import atexit
+import logging
+import os
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional, Union
+
+
+LOG_FORMAT = '%(asctime)s %(levelname)s [%(threadName)s] %(name)s: %(message)s'
+
+# Уровень по умолчанию (в продакшене LOG_LEVEL=WARNING отключает отладочные записи)
+DEFAULT_LOG_LEVEL = 'INFO'
+
+_listener: Optional[QueueListener] = None
+
+
+def setup_logging(level: Union[int, str, None] = None) -> QueueListener:
+    """
+    Настроить корневой логгер через очередь
+
+    Потоки обработки запросов только кладут записи в очередь,
+    запись в stdout выполняет фоновый поток QueueListener.
+    Повторный вызов возвращает уже запущенный listener.
+    Уровень по умолчанию берется из переменной окружения LOG_LEVEL.
+    """
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    if level is None:
+        level = os.getenv('LOG_LEVEL', DEFAULT_LOG_LEVEL).upper()
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    root.addHandler(QueueHandler(log_queue))
+    root.setLevel(level)
+
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+    return _listener
@@ -2,26 +2,74 @@
 REST API для анализа клиентов и генерации уведомлений
 """
 
-from flask import Flask, request, jsonify, Response
+from flask import Flask, request, Response
 from flask_restx import Api, Resource, fields, Namespace
 from flask_cors import CORS
-from typing import Dict, List, Any
-import json
-import random
-import psycopg2
-import csv
-import io
-from datetime import datetime, timedelta
+from flask_compress import Compress
+from typing import Dict, List, Any, Callable, Iterable, Iterator, Optional, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from functools import cache
+import logging
+import os
+import zlib
+from operator import itemgetter
+
+import msgspec
 
 from ..notifications import NotificationPipeline
 from .database_managers import MockDatabaseManager, RealDatabaseManager
-from .analyzer import analyze_client_with_scenarios
+from .analyzer import PartialAnalysis, analyze_client_fast, make_analyzer
+from .json_provider import OrjsonProvider, dumps_bytes, iter_json_object, output_json
+from .logging_config import setup_logging
+from .result_cache import AnalysisCache
+from .schemas import AnalyzeRequest, decode_analyze_request
 
 
-app = Flask(__name__)
+setup_logging()
+logger = logging.getLogger(__name__)
 
-# Настройка CORS
-CORS(app)
+app = Flask(__name__)
+app.json = OrjsonProvider(app)
+
+# Настройка CORS: только фронтенд на порту 5555
+CORS_ORIGINS = ["http://188.244.115.175:5555", "http://localhost:5555"]
+CORS(app, origins=CORS_ORIGINS)
+
+# Сжатие ответов (крупные JSON с текстами push-уведомлений)
+app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+app.config['COMPRESS_MIMETYPES'] = ['application/json', 'text/csv']
+app.config['COMPRESS_LEVEL'] = 4
+app.config['COMPRESS_BR_LEVEL'] = 4
+app.config['COMPRESS_MIN_SIZE'] = 500
+# Потоковые ответы (экспорт CSV, /analyze/all) Flask-Compress сжимает только
+# целиком, собрав тело в память; их сжимает streaming_response по мере отдачи
+app.config['COMPRESS_STREAMS'] = False
+Compress(app)
+
+
+def iter_gzip(chunks: Iterable[Any], level: int) -> Iterator[bytes]:
+    """
+    Сжатие потока gzip по мере генерации
+    
+    Сжатые блоки отдаются, как только zlib заполнит свой буфер,
+    поэтому тело ответа целиком в памяти не собирается.
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode() if isinstance(chunk, str) else chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def streaming_response(chunks: Iterable[Any], mimetype: str, headers: Optional[Dict[str, str]] = None) -> Response:
+    """Потоковый ответ, сжатый gzip, если клиент его принимает"""
+    headers = {**(headers or {}), 'Vary': 'Accept-Encoding'}
+    if request.accept_encodings.quality('gzip') <= 0:
+        return Response(chunks, mimetype=mimetype, headers=headers)
+    
+    headers['Content-Encoding'] = 'gzip'
+    return Response(iter_gzip(chunks, app.config['COMPRESS_LEVEL']), mimetype=mimetype, headers=headers)
 
 # Настройка Swagger
 api = Api(
@@ -31,17 +79,33 @@ api = Api(
     description='API для анализа клиентов и генерации персонализированных уведомлений',
     doc='/swagger/'
 )
+api.representation('application/json')(output_json)
+
+# Сериализованная схема Swagger (строится при первом обращении)
+_swagger_json = None
+
+
+def swagger_response() -> Response:
+    """Swagger JSON, сериализованный один раз на процесс"""
+    global _swagger_json
+    if _swagger_json is None:
+        schema = api.__schema__
+        if 'error' in schema:
+            # Схему построить не удалось - не кешируем, чтобы повторить попытку
+            return Response(dumps_bytes(schema), mimetype='application/json')
+        _swagger_json = dumps_bytes(schema)
+    return Response(_swagger_json, mimetype='application/json')
 
 # Добавляем маршруты для swagger.json
 @app.route('/swagger.json')
 def swagger_json():
     """Swagger JSON definition"""
-    return api.__schema__
+    return swagger_response()
 
 @app.route('/api/v1/swagger.json')
 def api_swagger_json():
     """API Swagger JSON definition"""
-    return api.__schema__
+    return swagger_response()
 
 # Создаем namespace для API
 ns = Namespace('api', description='Операции анализа клиентов', path='/api/v1')
@@ -97,8 +161,100 @@ error_model = api.model('Error', {
     'error': fields.String(description='Описание ошибки')
 })
 
-# Инициализируем пайплайн
-pipeline = NotificationPipeline()
+# Период анализа, используемый всеми эндпоинтами
+ANALYSIS_DAYS = 90
+
+
+@cache
+def get_pipeline() -> NotificationPipeline:
+    """Пайплайн уведомлений (создается при первом запросе, один на процесс)"""
+    return NotificationPipeline()
+
+
+@cache
+def get_analyzer() -> Callable[..., List[Dict[str, Any]]]:
+    """Анализатор, специализированный под ANALYSIS_DAYS (собирается один раз на процесс)"""
+    return make_analyzer(ANALYSIS_DAYS, get_pipeline().scenario_integration)
+
+
+def analyze_client(client_code, db_manager, top_k: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Анализ клиента за ANALYSIS_DAYS дней"""
+    return get_analyzer()(client_code, db_manager=db_manager, top_k=top_k)
+
+# Кеш результатов анализа для POST-запросов, ключ - хеш тела запроса
+payload_cache = AnalysisCache(maxsize=10_000, ttl=300)
+
+# Кеш анализа клиентов из БД, ключ - client_cache_key(); данные в БД меняются редко
+client_cache = AnalysisCache(maxsize=4096, ttl=300)
+
+# Заголовки успешных ответов анализа: ответ можно переиспользовать в течение минуты
+ANALYSIS_CACHE_HEADERS = {'Cache-Control': 'max-age=60'}
+
+
+# Ответ для клиента без подходящих продуктов (в CSV сообщение начинается с имени клиента)
+NO_PRODUCTS_NAME = 'Нет подходящих продуктов'
+NO_PRODUCTS_MESSAGE_TAIL = 'у вас пока нет подходящих продуктов. Мы уведомим, когда появятся новые предложения.'
+NO_PRODUCTS_RESPONSE = {
+    'product': NO_PRODUCTS_NAME,
+    'push_notification': 'У вас пока нет подходящих продуктов. Мы уведомим, когда появятся новые предложения.'
+}
+
+# Поля рекомендации в ответе /analyze/all и соответствующие поля уведомления
+# (анализатор всегда заполняет их все)
+RECOMMENDATION_KEYS = ('product', 'push_notification', 'score', 'expected_benefit', 'priority')
+_recommendation_fields = itemgetter('product_name', 'message', 'score', 'expected_benefit', 'priority')
+
+
+def to_recommendations(notifications: Sequence[Dict[str, Any]], limit: int) -> List[Dict[str, Any]]:
+    """Первые limit уведомлений в формате рекомендаций ответа (с умолчаниями для пропущенных полей)"""
+    recommendations = []
+    for n in notifications[:limit]:
+        score = n.get('score')
+        recommendations.append({
+            'product': n.get('product_name', ''),
+            'push_notification': n.get('message', ''),
+            'score': n.get('analysis_score', 0) if score is None else score,
+            'expected_benefit': n.get('expected_benefit', 0),
+            'priority': n.get('priority', 'low')
+        })
+    return recommendations
+
+
+def cache_analysis(cache: AnalysisCache, key, notifications: List[Dict[str, Any]]):
+    """Сохранить результат анализа (результат с таймаутом сценария не кешируется)"""
+    if not isinstance(notifications, PartialAnalysis):
+        cache.set(key, notifications)
+
+
+def client_cache_key(client_code, variant) -> tuple:
+    """
+    Ключ client_cache: (код клиента, период анализа, вариант)
+    
+    Вариант - top_k полного анализа или 'fast' для analyze_client_fast.
+    """
+    return (str(client_code), ANALYSIS_DAYS, variant)
+
+
+def analyze_payload(req: AnalyzeRequest, top_k: int) -> List[Dict[str, Any]]:
+    """
+    Анализ клиента по данным из тела запроса, top_k лучших уведомлений
+    
+    Повторный запрос с теми же данными отдается из кеша;
+    заголовок Cache-Control: no-cache принудительно запускает анализ заново.
+    """
+    key = (req.cache_key(), top_k)
+    notifications = None if request.cache_control.no_cache else payload_cache.get(key)
+    
+    if notifications is None:
+        mock_db_manager = MockDatabaseManager(req.client_info(), req.transactions, req.transfers)
+        notifications = analyze_client(req.client_code, mock_db_manager, top_k)
+        cache_analysis(payload_cache, key, notifications)
+    
+    return notifications
+
+
+# Тело ответа health check сериализуется один раз при загрузке модуля
+HEALTH_BODY = dumps_bytes({'status': 'healthy', 'service': 'push_analytics'})
 
 
 @ns.route('/health')
@@ -110,15 +266,30 @@ class HealthCheck(Resource):
         
         Проверяет работоспособность API
         """
-        return {'status': 'healthy', 'service': 'push_analytics'}, 200
+        return Response(HEALTH_BODY, status=200, mimetype='application/json')
+
+
+@ns.route('/cache/clear')
+class ClearCache(Resource):
+    @ns.doc(tags=['Система'])
+    def post(self):
+        """
+        Очистка кешей результатов анализа
+        
+        Следующие запросы выполнят анализ заново (например, после обновления данных в БД)
+        """
+        payload_cache.clear()
+        client_cache.clear()
+        logger.info("Кеши анализа очищены")
+        return {'status': 'cleared'}, 200
 
 
 @ns.route('/analyze')
 class AnalyzeClient(Resource):
-    @ns.expect(client_model)
-    @ns.marshal_with(analysis_response_model, code=200)
-    @ns.marshal_with(error_model, code=400)
-    @ns.marshal_with(error_model, code=500)
+    @ns.expect(client_model, validate=False)
+    @ns.response(200, 'Лучшая рекомендация', analysis_response_model)
+    @ns.response(400, 'Некорректные данные', error_model)
+    @ns.response(500, 'Ошибка обработки', error_model)
     @ns.doc(tags=['Анализ'])
     def post(self):
         """
@@ -128,44 +299,22 @@ class AnalyzeClient(Resource):
         с персонализированным push-уведомлением.
         """
         try:
-            data = request.get_json()
-            
-            # Валидируем входные данные
-            if not data:
+            # Разбираем и валидируем входные данные за один проход
+            try:
+                req = decode_analyze_request(request.get_data(cache=False))
+            except msgspec.ValidationError as e:
+                return {'error': f'Некорректные данные: {e}'}, 400
+            except msgspec.DecodeError:
                 return {'error': 'Отсутствуют данные'}, 400
             
-            required_fields = ['client_code', 'name', 'status', 'avg_monthly_balance_KZT']
-            for field in required_fields:
-                if field not in data:
-                    return {'error': f'Отсутствует обязательное поле: {field}'}, 400
-            
-            # Создаем мок-данные для анализа (в реальности используем БД)
-            client_code = data['client_code']
-            client_info = {
-                'client_code': client_code,
-                'name': data['name'],
-                'status': data['status'],
-                'avg_monthly_balance_KZT': data['avg_monthly_balance_KZT'],
-                'city': data.get('city', 'Алматы'),
-                'age': data.get('age', 30)
-            }
+            client_code = req.client_code
             
-            transactions = data.get('transactions', [])
-            transfers = data.get('transfers', [])
-            
-            # Создаем мок-менеджер БД
-            mock_db_manager = MockDatabaseManager(client_info, transactions, transfers)
-            
-            # Анализируем клиента
-            notifications = analyze_client_with_scenarios(client_code, 90, mock_db_manager)
+            # Анализируем клиента (на мок-данных из запроса)
+            notifications = analyze_payload(req, top_k=1)
             
             # Получаем лучшую рекомендацию
             if not notifications:
-                return {
-                    'client_code': client_code,
-                    'product': 'Нет подходящих продуктов',
-                    'push_notification': 'У вас пока нет подходящих продуктов. Мы уведомим, когда появятся новые предложения.'
-                }
+                return {'client_code': client_code, **NO_PRODUCTS_RESPONSE}
             
             best_notification = notifications[0]
             
@@ -173,7 +322,7 @@ class AnalyzeClient(Resource):
                 'client_code': client_code,
                 'product': best_notification.get('product_name', ''),
                 'push_notification': best_notification.get('message', '')
-            }
+            }, 200, ANALYSIS_CACHE_HEADERS
             
         except Exception as e:
             return {'error': f'Ошибка обработки запроса: {str(e)}'}, 500
@@ -181,10 +330,10 @@ class AnalyzeClient(Resource):
 
 @ns.route('/analyze/all')
 class AnalyzeClientAll(Resource):
-    @ns.expect(client_model)
-    @ns.marshal_with(all_analysis_response_model, code=200)
-    @ns.marshal_with(error_model, code=400)
-    @ns.marshal_with(error_model, code=500)
+    @ns.expect(client_model, validate=False)
+    @ns.response(200, 'Топ-4 рекомендации', all_analysis_response_model)
+    @ns.response(400, 'Некорректные данные', error_model)
+    @ns.response(500, 'Ошибка обработки', error_model)
     @ns.doc(tags=['Анализ'])
     def post(self):
         """
@@ -194,97 +343,102 @@ class AnalyzeClientAll(Resource):
         с персонализированными push-уведомлениями.
         """
         try:
-            data = request.get_json()
-            
-            if not data:
+            try:
+                req = decode_analyze_request(request.get_data(cache=False))
+            except msgspec.ValidationError as e:
+                return {'error': f'Некорректные данные: {e}'}, 400
+            except msgspec.DecodeError:
                 return {'error': 'Отсутствуют данные'}, 400
             
-            client_code = data['client_code']
-            client_info = {
-                'client_code': client_code,
-                'name': data['name'],
-                'status': data['status'],
-                'avg_monthly_balance_KZT': data['avg_monthly_balance_KZT'],
-                'city': data.get('city', 'Алматы'),
-                'age': data.get('age', 30)
-            }
-            
-            transactions = data.get('transactions', [])
-            transfers = data.get('transfers', [])
-            
-            mock_db_manager = MockDatabaseManager(client_info, transactions, transfers)
-            notifications = analyze_client_with_scenarios(client_code, 90, mock_db_manager)
+            client_code = req.client_code
             
             # Возвращаем топ-4 рекомендации
-            top_recommendations = notifications[:4]
+            top_recommendations = analyze_payload(req, top_k=4)
             
-            return {
-                'client_code': client_code,
-                'recommendations': [
-                    {
-                        'product': n.get('product_name', ''),
-                        'push_notification': n.get('message', ''),
-                        'score': n.get('score', n.get('analysis_score', 0)),
-                        'expected_benefit': n.get('expected_benefit', 0),
-                        'priority': n.get('priority', 'low')
-                    }
-                    for n in top_recommendations
-                ]
-            }
+            # Ответ отдается потоком: рекомендации сериализуются по одной
+            recommendations = (
+                dict(zip(RECOMMENDATION_KEYS, _recommendation_fields(n)))
+                for n in top_recommendations
+            )
+            return streaming_response(
+                iter_json_object({'client_code': client_code}, 'recommendations', recommendations),
+                mimetype='application/json',
+                headers=ANALYSIS_CACHE_HEADERS
+            )
             
         except Exception as e:
             return {'error': f'Ошибка обработки запроса: {str(e)}'}, 500
 
 
+# Размеры основных таблиц для /test/db-status
+DB_STATUS_QUERY = """
+    SELECT
+        (SELECT COUNT(*) FROM "Clients"),
+        (SELECT COUNT(*) FROM "Transactions"),
+        (SELECT COUNT(*) FROM "Transfers")
+"""
+
+# Оценка числа строк по статистике планировщика (без сканирования таблиц);
+# -1 - таблица еще ни разу не анализировалась
+DB_STATUS_ESTIMATE_QUERY = """
+    SELECT
+        (SELECT reltuples::bigint FROM pg_class WHERE oid = '"Clients"'::regclass),
+        (SELECT reltuples::bigint FROM pg_class WHERE oid = '"Transactions"'::regclass),
+        (SELECT reltuples::bigint FROM pg_class WHERE oid = '"Transfers"'::regclass)
+"""
+
+
 @ns.route('/test/db-status')
 class TestDatabaseStatus(Resource):
     @ns.doc(tags=['Тестирование'])
     def get(self):
         """
         Проверка статуса подключения к базе данных
+        
+        С параметром ?estimate=1 количества строк берутся из статистики
+        планировщика (pg_class.reltuples) вместо COUNT(*).
         """
         try:
-            print("🔍 Проверяем подключение к БД...")
-            
-            db_manager = RealDatabaseManager()
-            
-            if not db_manager.connection:
-                return {
-                    'status': 'error',
-                    'message': 'Не удалось подключиться к базе данных',
-                    'connected': False
-                }, 500
-            
-            # Проверяем количество клиентов
-            try:
-                with db_manager.connection.cursor() as cursor:
-                    cursor.execute("SELECT COUNT(*) FROM \"Clients\"")
-                    client_count = cursor.fetchone()[0]
-                    
-                    cursor.execute("SELECT COUNT(*) FROM \"Transactions\"")
-                    transaction_count = cursor.fetchone()[0]
-                    
-                    cursor.execute("SELECT COUNT(*) FROM \"Transfers\"")
-                    transfer_count = cursor.fetchone()[0]
+            logger.info("Проверка подключения к БД")
+            
+            with RealDatabaseManager() as db_manager:
+                if not db_manager.connection:
+                    return {
+                        'status': 'error',
+                        'message': 'Не удалось подключиться к базе данных',
+                        'connected': False
+                    }, 500
                 
-                db_manager.close()
-                
-                return {
-                    'status': 'success',
-                    'message': 'Подключение к БД установлено',
-                    'connected': True,
-                    'clients_count': client_count,
-                    'transactions_count': transaction_count,
-                    'transfers_count': transfer_count
-                }
-                
-            except Exception as e:
-                db_manager.close()
-                return {
-                    'status': 'error',
-                    'message': f'Ошибка выполнения запросов: {str(e)}',
-                    'connected': False
-                }, 500
+                # Проверяем количество клиентов, транзакций и переводов (один запрос к БД)
+                estimated = request.args.get('estimate') == '1'
+                try:
+                    with db_manager.connection.cursor() as cursor:
+                        if estimated:
+                            cursor.execute(DB_STATUS_ESTIMATE_QUERY)
+                            counts = cursor.fetchone()
+                            # Без статистики оценка бессмысленна - считаем точно
+                            if min(counts) < 0:
+                                estimated = False
+                        if not estimated:
+                            cursor.execute(DB_STATUS_QUERY)
+                            counts = cursor.fetchone()
+                        client_count, transaction_count, transfer_count = counts
+                except Exception as e:
+                    return {
+                        'status': 'error',
+                        'message': f'Ошибка выполнения запросов: {str(e)}',
+                        'connected': False
+                    }, 500
+            
+            return {
+                'status': 'success',
+                'message': 'Подключение к БД установлено',
+                'connected': True,
+                'clients_count': client_count,
+                'transactions_count': transaction_count,
+                'transfers_count': transfer_count,
+                'estimated': estimated
+            }
                 
         except Exception as e:
             return {
@@ -299,61 +453,42 @@ class TestRandomClient(Resource):
     @ns.doc(tags=['Тестирование'])
     def get(self):
         """Быстрый анализ случайного клиента с таймаутом"""
-        print("🚀 НАЧИНАЕМ БЫСТРЫЙ АНАЛИЗ")
         try:
-            print("🔧 Создаем менеджер БД...")
-            # Создаем реальный менеджер БД
-            db_manager = RealDatabaseManager()
-            print("✅ Менеджер БД создан")
-            
-            if not db_manager.connection:
-                return {'error': 'Не удалось подключиться к базе данных'}, 500
-            
-            # Получаем случайного клиента
-            client_code = db_manager.get_random_client_code()
-            if not client_code:
-                db_manager.close()
-                return {'error': 'Не найдено клиентов в базе данных'}, 400
-            
-            print(f"🎯 Анализируем клиента: {client_code}")
-            
-            # Полный анализ всех продуктов
-            notifications = analyze_client_with_scenarios(client_code, 90, db_manager)
-            
-            print(f"📈 Получено: {len(notifications) if notifications else 0} уведомлений")
-            
-            # Закрываем соединение
-            db_manager.close()
+            # Создаем реальный менеджер БД (соединение вернется в пул при выходе)
+            with RealDatabaseManager() as db_manager:
+                if not db_manager.connection:
+                    return {'error': 'Не удалось подключиться к базе данных'}, 500
+                
+                # Получаем случайного клиента
+                client_code = db_manager.get_random_client_code()
+                if not client_code:
+                    return {'error': 'Не найдено клиентов в базе данных'}, 400
+                
+                logger.info("Анализ случайного клиента %s", client_code)
+                
+                # Полный анализ всех продуктов (кеш общий с /test/client)
+                cache_key = client_cache_key(client_code, 3)
+                notifications = None if request.cache_control.no_cache else client_cache.get(cache_key)
+                if notifications is None:
+                    notifications = analyze_client(client_code, db_manager, top_k=3)
+                    cache_analysis(client_cache, cache_key, notifications)
             
             if not notifications:
                 return {'client_code': int(client_code), 'recommendations': []}
             
             # Создаем рекомендации
-            recommendations = []
-            for n in notifications[:3]:
-                rec = {
-                    'product': n.get('product_name', ''),
-                    'push_notification': n.get('message', ''),
-                    'score': n.get('score', n.get('analysis_score', 0)),
-                    'expected_benefit': n.get('expected_benefit', 0),
-                    'priority': n.get('priority', 'low')
-                }
-                recommendations.append(rec)
+            recommendations = to_recommendations(notifications, 3)
             
             result = {
                 'client_code': int(client_code),
                 'recommendations': recommendations
             }
             
-            print(f"📊 РЕЗУЛЬТАТ: {len(recommendations)} рекомендаций")
+            logger.debug("Рекомендаций: %d", len(recommendations))
             return result
             
         except Exception as e:
-            print(f"❌ КРИТИЧЕСКАЯ ОШИБКА В ENDPOINT: {str(e)}")
-            print(f"❌ Тип ошибки: {type(e).__name__}")
-            import traceback
-            print(f"❌ Полный traceback:")
-            traceback.print_exc()
+            logger.exception("Критическая ошибка анализа случайного клиента")
             return {'error': f'Ошибка: {str(e)}'}, 500
 
 
@@ -362,146 +497,189 @@ class TestSpecificClient(Resource):
     @ns.doc(tags=['Тестирование'])
     def get(self, client_code):
         """Анализ конкретного клиента из БД"""
-        print(f"🎯 Анализ клиента: {client_code}")
+        logger.info("Анализ клиента %s", client_code)
         try:
-            # Создаем реальный менеджер БД
-            db_manager = RealDatabaseManager()
-            
-            if not db_manager.connection:
-                return {'error': 'Не удалось подключиться к базе данных'}, 500
-            
-            # Проверяем существование клиента
-            client_info = db_manager.get_client_by_code(str(client_code))
-            if not client_info:
-                db_manager.close()
-                return {'error': f'Клиент с кодом {client_code} не найден'}, 400
-            
-            print(f"👤 Клиент: {client_info.get('name', 'Неизвестно')}")
-            
-            # Анализируем клиента
-            notifications = analyze_client_with_scenarios(str(client_code), 90, db_manager)
-            
-            print(f"📈 Получено: {len(notifications) if notifications else 0} уведомлений")
-            
-            # Закрываем соединение
-            db_manager.close()
+            # Повторный анализ того же клиента отдается из кеша (общий с экспортом клиента)
+            cache_key = client_cache_key(client_code, 3)
+            notifications = None if request.cache_control.no_cache else client_cache.get(cache_key)
+            
+            if notifications is None:
+                # Создаем реальный менеджер БД (соединение вернется в пул при выходе)
+                with RealDatabaseManager() as db_manager:
+                    if not db_manager.connection:
+                        return {'error': 'Не удалось подключиться к базе данных'}, 500
+                    
+                    # Проверяем существование клиента
+                    client_info = db_manager.get_client_by_code(str(client_code))
+                    if not client_info:
+                        return {'error': f'Клиент с кодом {client_code} не найден'}, 400
+                    
+                    # Анализируем клиента
+                    notifications = analyze_client(str(client_code), db_manager, top_k=3)
+                
+                cache_analysis(client_cache, cache_key, notifications)
             
             if not notifications:
                 return {'client_code': int(client_code), 'recommendations': []}
             
             # Создаем рекомендации
-            recommendations = []
-            for n in notifications[:3]:
-                rec = {
-                    'product': n.get('product_name', ''),
-                    'push_notification': n.get('message', ''),
-                    'score': n.get('score', n.get('analysis_score', 0)),
-                    'expected_benefit': n.get('expected_benefit', 0),
-                    'priority': n.get('priority', 'low')
-                }
-                recommendations.append(rec)
+            recommendations = to_recommendations(notifications, 3)
             
             result = {
                 'client_code': int(client_code),
                 'recommendations': recommendations
             }
             
-            print(f"📊 РЕЗУЛЬТАТ: {len(recommendations)} рекомендаций")
+            logger.debug("Рекомендаций: %d", len(recommendations))
             return result
             
         except Exception as e:
-            print(f"❌ ОШИБКА: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Ошибка анализа клиента %s", client_code)
             return {'error': f'Ошибка: {str(e)}'}, 500
 
 
+# Заголовок CSV-экспорта рекомендаций
+CSV_HEADER = ('client_code', 'product', 'push_notification')
+
+
+def csv_field(value: Any) -> str:
+    """Поле CSV в кавычках только при необходимости (как csv.QUOTE_MINIMAL)"""
+    if value is None:
+        return ''
+    text = value if isinstance(value, str) else str(value)
+    if ',' in text or '"' in text or '\n' in text or '\r' in text:
+        return '"' + text.replace('"', '""') + '"'
+    return text
+
+
+def iter_csv(rows: Iterable[Sequence[Any]]) -> Iterator[str]:
+    """
+    Построчная сериализация CSV для потокового ответа
+    
+    Формат совпадает с csv.writer по умолчанию (разделитель ',', строки '\r\n'),
+    но без диспетчеризации диалекта и промежуточного буфера на каждую строку.
+    """
+    for row in rows:
+        yield ','.join(map(csv_field, row)) + '\r\n'
+
+
+# Пул для параллельного анализа клиентов при экспорте (отдельный от пула сценариев)
+EXPORT_WORKERS = 8
+
+# Число клиентов в экспорте (ограничено для демо) и размер порции серверного курсора
+EXPORT_CLIENT_LIMIT = 50
+EXPORT_FETCH_SIZE = 500
+
+EXPORT_CLIENTS_QUERY = """
+    SELECT client_code, name
+    FROM "Clients"
+    ORDER BY client_code
+    LIMIT %s
+"""
+_export_executor = ThreadPoolExecutor(max_workers=EXPORT_WORKERS, thread_name_prefix='export')
+
+
+def _analyze_export_client(client_code, bundle: Optional[tuple] = None) -> List[Dict[str, Any]]:
+    """
+    Быстрый анализ одного клиента для экспорта (через кеш)
+    
+    Если передан bundle (данные клиента, транзакции, переводы), полученный
+    пакетным запросом, анализ идет в памяти; иначе клиент читается
+    на собственном соединении из пула.
+    """
+    key = client_cache_key(client_code, 'fast')
+    notifications = client_cache.get(key)
+    if notifications is None:
+        if bundle is not None:
+            client_info, transactions, transfers = bundle
+            notifications = analyze_client_fast(
+                str(client_code), ANALYSIS_DAYS,
+                MockDatabaseManager(client_info, transactions, transfers)
+            )
+        else:
+            with RealDatabaseManager() as db_manager:
+                if not db_manager.connection:
+                    raise RuntimeError('Нет свободного соединения с БД')
+                notifications = analyze_client_fast(str(client_code), ANALYSIS_DAYS, db_manager)
+        cache_analysis(client_cache, key, notifications)
+    return notifications
+
+
 @ns.route('/export/csv')
 class ExportCSV(Resource):
     @ns.doc(tags=['Экспорт'])
     def get(self):
         """Экспорт рекомендаций в CSV формате"""
-        print("📊 Начинаем экспорт CSV...")
+        logger.info("Экспорт CSV")
         try:
-            # Создаем реальный менеджер БД
-            db_manager = RealDatabaseManager()
+            # Создаем реальный менеджер БД (соединение вернется в пул при выходе)
+            with RealDatabaseManager() as db_manager:
+                if not db_manager.connection:
+                    return {'error': 'Не удалось подключиться к базе данных'}, 500
+                
+                # Получаем список клиентов серверным курсором (порциями по EXPORT_FETCH_SIZE)
+                try:
+                    with db_manager.connection.cursor(name='export_clients') as cursor:
+                        cursor.itersize = EXPORT_FETCH_SIZE
+                        cursor.execute(EXPORT_CLIENTS_QUERY, (EXPORT_CLIENT_LIMIT,))
+                        clients = [(client_code, client_name) for client_code, client_name in cursor]
+                except Exception:
+                    logger.exception("Ошибка получения клиентов для экспорта")
+                    return {'error': 'Ошибка получения клиентов'}, 500
+                
+                # Данные некешированных клиентов читаются тремя запросами на всю выборку
+                # (None - пакетный запрос не удался, клиенты читаются по одному)
+                uncached_codes = [
+                    client_code for client_code, _ in clients
+                    if client_cache.get(client_cache_key(client_code, 'fast')) is None
+                ]
+                bundles = db_manager.fetch_client_bundles(uncached_codes, ANALYSIS_DAYS) if uncached_codes else {}
             
-            if not db_manager.connection:
-                return {'error': 'Не удалось подключиться к базе данных'}, 500
+            logger.debug("Найдено клиентов: %d", len(clients))
             
-            # Получаем список всех клиентов (ограничиваем 50 для демо)
-            try:
-                with db_manager.connection.cursor() as cursor:
-                    cursor.execute("""
-                        SELECT client_code, name 
-                        FROM "Clients" 
-                        ORDER BY client_code 
-                        LIMIT 50
-                    """)
-                    clients = cursor.fetchall()
-            except Exception as e:
-                print(f"❌ Ошибка получения клиентов: {e}")
-                db_manager.close()
-                return {'error': 'Ошибка получения клиентов'}, 500
-            
-            print(f"👥 Найдено клиентов: {len(clients)}")
-            
-            # Создаем CSV в памяти
-            output = io.StringIO()
-            writer = csv.writer(output)
-            
-            # Заголовки CSV
-            writer.writerow(['client_code', 'product', 'push_notification'])
-            
-            # Обрабатываем каждого клиента
-            for i, (client_code, client_name) in enumerate(clients):
-                try:
-                    print(f"📈 Обрабатываем клиента {i+1}/{len(clients)}: {client_code}")
-                    
-                    # Анализируем клиента (быстрый анализ)
-                    from .analyzer import analyze_client_fast
-                    notifications = analyze_client_fast(str(client_code), 90, db_manager)
+            # Анализируем клиентов параллельно
+            futures = [
+                _export_executor.submit(
+                    _analyze_export_client, client_code,
+                    bundles.get(str(client_code)) if bundles is not None else None
+                )
+                for client_code, _ in clients
+            ]
+            
+            def export_rows():
+                yield CSV_HEADER
+                
+                # Результаты записываются в исходном порядке клиентов
+                for (client_code, client_name), future in zip(clients, futures):
+                    try:
+                        notifications = future.result()
+                    except Exception:
+                        logger.exception("Ошибка обработки клиента %s", client_code)
+                        # Строка с ошибкой
+                        yield (
+                            client_code,
+                            'Ошибка анализа',
+                            f'{client_name}, произошла ошибка при анализе ваших данных.'
+                        )
+                        continue
                     
                     if notifications:
                         # Берем лучшую рекомендацию
                         best_notification = notifications[0]
-                        
-                        # Добавляем строку в CSV
-                        writer.writerow([
+                        yield (
                             client_code,
                             best_notification.get('product_name', ''),
                             best_notification.get('message', '')
-                        ])
+                        )
                     else:
                         # Если нет рекомендаций
-                        writer.writerow([
-                            client_code,
-                            'Нет подходящих продуктов',
-                            f'{client_name}, у вас пока нет подходящих продуктов. Мы уведомим, когда появятся новые предложения.'
-                        ])
+                        yield (client_code, NO_PRODUCTS_NAME, f'{client_name}, {NO_PRODUCTS_MESSAGE_TAIL}')
                 
-                except Exception as e:
-                    print(f"❌ Ошибка обработки клиента {client_code}: {e}")
-                    # Добавляем строку с ошибкой
-                    writer.writerow([
-                        client_code,
-                        'Ошибка анализа',
-                        f'{client_name}, произошла ошибка при анализе ваших данных.'
-                    ])
-                    continue
-            
-            # Закрываем соединение
-            db_manager.close()
-            
-            # Подготавливаем CSV для скачивания
-            csv_data = output.getvalue()
-            output.close()
+                logger.info("CSV экспорт завершен: %d клиентов", len(clients))
             
-            print(f"✅ CSV создан, размер: {len(csv_data)} символов")
-            
-            # Возвращаем CSV файл
-            response = Response(
-                csv_data,
+            # Возвращаем CSV потоком: строки уходят клиенту по мере готовности анализа
+            return streaming_response(
+                iter_csv(export_rows()),
                 mimetype='text/csv',
                 headers={
                     'Content-Disposition': 'attachment; filename=recommendations.csv',
@@ -509,12 +687,8 @@ class ExportCSV(Resource):
                 }
             )
             
-            return response
-            
         except Exception as e:
-            print(f"❌ ОШИБКА экспорта CSV: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Ошибка экспорта CSV")
             return {'error': f'Ошибка экспорта: {str(e)}'}, 500
 
 
@@ -523,60 +697,44 @@ class ExportSingleClientCSV(Resource):
     @ns.doc(tags=['Экспорт'])
     def get(self, client_code):
         """Экспорт рекомендаций для одного клиента в CSV"""
-        print(f"📊 Экспорт CSV для клиента: {client_code}")
+        logger.info("Экспорт CSV для клиента %s", client_code)
         try:
-            # Создаем реальный менеджер БД
-            db_manager = RealDatabaseManager()
-            
-            if not db_manager.connection:
-                return {'error': 'Не удалось подключиться к базе данных'}, 500
-            
-            # Проверяем существование клиента
-            client_info = db_manager.get_client_by_code(str(client_code))
-            if not client_info:
-                db_manager.close()
-                return {'error': f'Клиент с кодом {client_code} не найден'}, 400
-            
-            client_name = client_info.get('name', 'Клиент')
-            
-            # Анализируем клиента
-            notifications = analyze_client_with_scenarios(str(client_code), 90, db_manager)
-            
-            # Закрываем соединение
-            db_manager.close()
-            
-            # Создаем CSV в памяти
-            output = io.StringIO()
-            writer = csv.writer(output)
+            # Результат анализа берется из кеша, если клиента недавно анализировали
+            cache_key = client_cache_key(client_code, 3)
+            notifications = None if request.cache_control.no_cache else client_cache.get(cache_key)
             
-            # Заголовки CSV
-            writer.writerow(['client_code', 'product', 'push_notification'])
+            # Без рекомендаций нужно имя клиента из БД
+            if not notifications:
+                # Создаем реальный менеджер БД (соединение вернется в пул при выходе)
+                with RealDatabaseManager() as db_manager:
+                    if not db_manager.connection:
+                        return {'error': 'Не удалось подключиться к базе данных'}, 500
+                    
+                    # Проверяем существование клиента
+                    client_info = db_manager.get_client_by_code(str(client_code))
+                    if not client_info:
+                        return {'error': f'Клиент с кодом {client_code} не найден'}, 400
+                    
+                    client_name = client_info.get('name', 'Клиент')
+                    
+                    # Анализируем клиента
+                    if notifications is None:
+                        notifications = analyze_client(str(client_code), db_manager, top_k=3)
+                        cache_analysis(client_cache, cache_key, notifications)
             
             if notifications:
-                # Добавляем топ-3 рекомендации
-                for notification in notifications[:3]:
-                    writer.writerow([
-                        client_code,
-                        notification.get('product_name', ''),
-                        notification.get('message', '')
-                    ])
+                # Топ-3 рекомендации
+                rows = [
+                    (client_code, notification.get('product_name', ''), notification.get('message', ''))
+                    for notification in notifications[:3]
+                ]
             else:
                 # Если нет рекомендаций
-                writer.writerow([
-                    client_code,
-                    'Нет подходящих продуктов',
-                    f'{client_name}, у вас пока нет подходящих продуктов. Мы уведомим, когда появятся новые предложения.'
-                ])
-            
-            # Подготавливаем CSV для скачивания
-            csv_data = output.getvalue()
-            output.close()
-            
-            print(f"✅ CSV создан для клиента {client_code}")
+                rows = [(client_code, NO_PRODUCTS_NAME, f'{client_name}, {NO_PRODUCTS_MESSAGE_TAIL}')]
             
             # Возвращаем CSV файл
-            response = Response(
-                csv_data,
+            return streaming_response(
+                iter_csv([CSV_HEADER, *rows]),
                 mimetype='text/csv',
                 headers={
                     'Content-Disposition': f'attachment; filename=client_{client_code}_recommendations.csv',
@@ -584,12 +742,16 @@ class ExportSingleClientCSV(Resource):
                 }
             )
             
-            return response
-            
         except Exception as e:
-            print(f"❌ ОШИБКА экспорта CSV: {str(e)}")
+            logger.exception("Ошибка экспорта CSV для клиента %s", client_code)
             return {'error': f'Ошибка экспорта: {str(e)}'}, 500
 
 
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    # Только для локальной разработки; в продакшене приложение обслуживает gunicorn
+    app.run(
+        host='0.0.0.0',
+        port=int(os.getenv('FLASK_PORT', 5000)),
+        debug=os.getenv('FLASK_ENV', 'production') == 'development',
+        threaded=True
+    )
@@ -0,0 +1,31 @@
+"""
+Кеш результатов анализа клиентов
+"""
+
+import threading
+from typing import Any, Hashable, Optional
+
+from cachetools import TTLCache
+
+
+class AnalysisCache:
+    """Потокобезопасный TTL-кеш результатов анализа"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Получить результат из кеша (None, если нет или истек)"""
+        with self._lock:
+            return self._cache.get(key)
+
+    def set(self, key: Hashable, value: Any):
+        """Сохранить результат в кеш"""
+        with self._lock:
+            self._cache[key] = value
+
+    def clear(self):
+        """Очистить кеш"""
+        with self._lock:
+            self._cache.clear()
@@ -0,0 +1,73 @@
+"""
+Схемы входных данных API
+"""
+
+from typing import Dict, List, Any, Optional, TypedDict
+import hashlib
+
+import msgspec
+
+
+# Транзакции и переводы остаются словарями: сценарии читают их через .get()
+# с умолчаниями, поэтому все поля необязательны (проверяются только типы)
+class Transaction(TypedDict, total=False):
+    """Транзакция клиента"""
+
+    date: str
+    category: str
+    amount: float
+    currency: str
+
+
+class Transfer(TypedDict, total=False):
+    """Перевод клиента"""
+
+    date: str
+    type: str
+    direction: str
+    amount: float
+    currency: str
+
+
+class AnalyzeRequest(msgspec.Struct):
+    """Тело запроса на анализ клиента"""
+
+    client_code: int
+    name: str
+    status: str
+    avg_monthly_balance_KZT: float
+    # null допускается, как и до валидации схемой (значение передается как есть)
+    city: Optional[str] = 'Алматы'
+    age: Optional[int] = 30
+    transactions: List[Transaction] = []
+    transfers: List[Transfer] = []
+
+    def client_info(self) -> Dict[str, Any]:
+        """Данные клиента в формате менеджеров БД"""
+        return {
+            'client_code': self.client_code,
+            'name': self.name,
+            'status': self.status,
+            'avg_monthly_balance_KZT': self.avg_monthly_balance_KZT,
+            'city': self.city,
+            'age': self.age
+        }
+
+    def cache_key(self) -> bytes:
+        """Хеш нормализованного содержимого запроса (ключ кеша результатов)"""
+        return hashlib.blake2b(msgspec.json.encode(self), digest_size=16).digest()
+
+
+# Декодер переиспользуется между запросами: парсинг и валидация за один проход
+_analyze_request_decoder = msgspec.json.Decoder(AnalyzeRequest)
+
+
+def decode_analyze_request(raw: bytes) -> AnalyzeRequest:
+    """
+    Разобрать и провалидировать тело запроса на анализ
+
+    Raises:
+        msgspec.ValidationError: если данные не соответствуют схеме
+        msgspec.DecodeError: если тело пустое или не является JSON
+    """
+    return _analyze_request_decoder.decode(raw)
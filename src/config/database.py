@@ -20,19 +20,25 @@ class DatabaseConfig:
         self.sslmode = os.getenv('PGSSLMODE', 'require')
         self.channel_binding = os.getenv('PGCHANNELBINDING', 'require')
         
+        # Размер пула соединений на процесс (не меньше числа потоков воркера)
+        self.pool_minconn = int(os.getenv('PGPOOL_MIN', '2'))
+        self.pool_maxconn = int(os.getenv('PGPOOL_MAX', '20'))
+        
+        # Подготовленные запросы (PREPARE/EXECUTE) на соединениях пула.
+        # Не включать при подключении через PgBouncer в режиме transaction
+        # (хост -pooler у Neon): подготовленные запросы живут в сессии сервера.
+        self.prepare_statements = os.getenv('PGPREPARE', '0') == '1'
+        
         # Получаем полную строку подключения если есть
         self.database_url = os.getenv('DATABASE_URL')
-    
-    def get_connection_string(self) -> str:
-        """Получить строку подключения к базе данных"""
-        if self.database_url:
-            return self.database_url
         
-        return f"postgresql://{self.user}:{self.password}@{self.host}:{self.port}/{self.database}?sslmode={self.sslmode}&channel_binding={self.channel_binding}"
-    
-    def get_connection_params(self) -> dict:
-        """Получить параметры подключения"""
-        return {
+        # Конфигурация не меняется после создания - строка и параметры
+        # подключения собираются один раз
+        self._connection_string = self.database_url or (
+            f"postgresql://{self.user}:{self.password}@{self.host}:{self.port}/{self.database}"
+            f"?sslmode={self.sslmode}&channel_binding={self.channel_binding}"
+        )
+        self._connection_params = {
             'host': self.host,
             'port': self.port,
             'database': self.database,
@@ -41,6 +47,14 @@ class DatabaseConfig:
             'sslmode': self.sslmode,
             'channel_binding': self.channel_binding
         }
+    
+    def get_connection_string(self) -> str:
+        """Получить строку подключения к базе данных"""
+        return self._connection_string
+    
+    def get_connection_params(self) -> dict:
+        """Получить параметры подключения (копия, ее можно изменять)"""
+        return dict(self._connection_params)
 
 
 # Глобальный экземпляр конфигурации
@@ -2,14 +2,24 @@
 Пример интеграции сценариев продуктов с генерацией уведомлений
 """
 
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+import csv
+import logging
+from .notification_ai import PRIORITY_RANK
 from .scenario_integration import ScenarioIntegration
-from ..products import (
-    TravelCardScenario, PremiumCardScenario, CreditCardScenario,
-    CurrencyExchangeScenario, MultiCurrencyDepositScenario,
-    SavingsDepositScenario, AccumulationDepositScenario,
-    InvestmentsScenario, GoldBarsScenario, CashCreditScenario
-)
+from ..products.client_snapshot import CachingDatabaseManager
+from ..products.registry import SCENARIO_KEYS, get_scenarios
+
+
+logger = logging.getLogger(__name__)
+
+# Колонки итогового CSV с пуш-уведомлениями
+FINAL_PUSHES_CSV_HEADER = ('client_code', 'product', 'push_notification', 'priority', 'score')
+
+# Пул для параллельного запуска сценариев одного клиента (общий для всех пайплайнов);
+# у каждого потока свои экземпляры сценариев (get_scenarios)
+_pipeline_executor = ThreadPoolExecutor(max_workers=len(SCENARIO_KEYS), thread_name_prefix='pipeline')
 
 
 class NotificationPipeline:
@@ -17,18 +27,6 @@ class NotificationPipeline:
     
     def __init__(self):
         self.integration = ScenarioIntegration()
-        self.scenarios = {
-            'travel_card': TravelCardScenario(),
-            'premium_card': PremiumCardScenario(),
-            'credit_card': CreditCardScenario(),
-            'currency_exchange': CurrencyExchangeScenario(),
-            'multi_currency_deposit': MultiCurrencyDepositScenario(),
-            'savings_deposit': SavingsDepositScenario(),
-            'accumulation_deposit': AccumulationDepositScenario(),
-            'investments': InvestmentsScenario(),
-            'gold_bars': GoldBarsScenario(),
-            'cash_credit': CashCreditScenario()
-        }
     
     def analyze_and_generate_notifications(self, client_code: str, days: int, 
                                          db_manager) -> List[Dict[str, Any]]:
@@ -45,39 +43,71 @@ class NotificationPipeline:
         """
         notifications = []
         
-        # Анализируем клиента для каждого продукта
-        for product_key, scenario in self.scenarios.items():
-            try:
-                # Получаем результат анализа сценария
-                scenario_result = scenario.analyze_client(client_code, days, db_manager)
-                
-                # Получаем данные клиента
-                client_data = scenario.get_client_data(client_code, days, db_manager)
-                
-                # Генерируем уведомление
-                notification = self.integration.generate_notification_from_scenario(
-                    client_data, scenario_result, scenario.product_name
-                )
-                
-                # Добавляем метаданные
-                notification.update({
-                    'client_code': client_code,
-                    'product_key': product_key,
-                    'analysis_score': scenario_result.get('score', 0),
-                    'expected_benefit': scenario_result.get('expected_benefit', 0)
-                })
-                
+        # Данные клиента загружаются один раз и переиспользуются всеми сценариями
+        db_manager = self._load_client_bundle(client_code, days, db_manager)
+        
+        # Анализируем клиента по всем продуктам параллельно
+        futures = [
+            _pipeline_executor.submit(self._run_scenario, product_key, client_code, days, db_manager)
+            for product_key in SCENARIO_KEYS
+        ]
+        
+        # Результаты собираются в исходном порядке продуктов
+        for future in futures:
+            notification = future.result()
+            if notification is not None:
                 notifications.append(notification)
-                
-            except Exception as e:
-                print(f"Ошибка анализа продукта {product_key} для клиента {client_code}: {e}")
-                continue
         
-        # Сортируем по приоритету и скорингу
-        notifications.sort(key=lambda x: (x['priority'], x['analysis_score']), reverse=True)
+        # Сортируем по приоритету (числовой ранг) и скорингу
+        notifications.sort(key=lambda x: (PRIORITY_RANK.get(x['priority'], 0), x['analysis_score']), reverse=True)
         
         return notifications
     
+    def _run_scenario(self, product_key: str, client_code: str, days: int,
+                      db_manager) -> Optional[Dict[str, Any]]:
+        """Анализ клиента одним сценарием и генерация уведомления (None при ошибке)"""
+        try:
+            # Сценарий потока очищается от данных предыдущего клиента
+            scenario = get_scenarios()[product_key]
+            scenario.reset()
+            
+            # Получаем результат анализа сценария
+            scenario_result = scenario.analyze_client(client_code, days, db_manager)
+            
+            # Получаем данные клиента
+            client_data = scenario.get_client_data(client_code, days, db_manager)
+            
+            # Генерируем уведомление
+            notification = self.integration.generate_notification_from_scenario(
+                client_data, scenario_result, scenario.product_name
+            )
+            
+            # Добавляем метаданные
+            notification.update({
+                'client_code': client_code,
+                'product_key': product_key,
+                'analysis_score': scenario_result.get('score', 0),
+                'expected_benefit': scenario_result.get('expected_benefit', 0)
+            })
+            
+            return notification
+            
+        except Exception:
+            logger.exception("Ошибка анализа продукта %s для клиента %s", product_key, client_code)
+            return None
+    
+    def _load_client_bundle(self, client_code: str, days: int, db_manager):
+        """
+        Снимок данных клиента за период для всех сценариев
+        
+        Клиент, транзакции и переводы читаются одним запросом (если менеджер
+        поддерживает fetch_client_bundle), повторные запросы сценариев
+        отдаются из памяти.
+        """
+        snapshot = CachingDatabaseManager(db_manager)
+        snapshot.prefetch(client_code, days)
+        return snapshot
+    
     def get_best_recommendation(self, notifications: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Получить лучшую рекомендацию (топ-1)"""
         if not notifications:
@@ -93,31 +123,29 @@ class NotificationPipeline:
     def generate_final_pushes_csv(self, notifications: List[Dict[str, Any]], 
                                 filename: str = 'final_pushes.csv') -> str:
         """Генерация финального CSV файла с пуш-уведомлениями"""
-        import csv
-        
         # Фильтруем только уведомления с высоким и средним приоритетом
         filtered_notifications = [
             n for n in notifications 
-            if n.get('priority') in ['high', 'medium']
+            if n.get('priority') in ('high', 'medium')
         ]
         
-        # Берем только топ-4
-        top_notifications = filtered_notifications[:4]
+        # Берем только топ-4 и сразу собираем строки CSV
+        rows = [
+            (
+                n.get('client_code', ''),
+                n.get('product_name', ''),
+                n.get('message', ''),
+                n.get('priority', ''),
+                n.get('analysis_score', 0)
+            )
+            for n in filtered_notifications[:4]
+        ]
         
-        # Записываем в CSV
+        # Записываем в CSV одним вызовом
         with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-            fieldnames = ['client_code', 'product', 'push_notification', 'priority', 'score']
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            
-            writer.writeheader()
-            for notification in top_notifications:
-                writer.writerow({
-                    'client_code': notification.get('client_code', ''),
-                    'product': notification.get('product_name', ''),
-                    'push_notification': notification.get('message', ''),
-                    'priority': notification.get('priority', ''),
-                    'score': notification.get('analysis_score', 0)
-                })
+            writer = csv.writer(csvfile)
+            writer.writerow(FINAL_PUSHES_CSV_HEADER)
+            writer.writerows(rows)
         
         return filename
 
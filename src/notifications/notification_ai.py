@@ -7,6 +7,11 @@ from datetime import datetime
 from .message_templates import MessageTemplates
 
 
+# Числовой ранг приоритета уведомления для сортировки
+# (строки 'high' < 'low' < 'medium' в алфавитном порядке сортируются неверно)
+PRIORITY_RANK = {'high': 2, 'medium': 1, 'low': 0}
+
+
 class NotificationAI:
     """Прокси-ИИ для генерации умных уведомлений"""
     
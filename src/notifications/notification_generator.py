@@ -4,7 +4,7 @@
 
 from typing import Dict, List, Any, Optional
 from datetime import datetime
-from .notification_ai import NotificationAI
+from .notification_ai import NotificationAI, PRIORITY_RANK
 from .message_templates import MessageTemplates
 
 
@@ -63,7 +63,7 @@ class NotificationGenerator:
             notifications.append(notification)
         
         # Сортируем по приоритету и скорингу
-        notifications.sort(key=lambda x: (x['priority'], x['score']), reverse=True)
+        notifications.sort(key=lambda x: (PRIORITY_RANK.get(x['priority'], 0), x['score']), reverse=True)
         
         return notifications
     
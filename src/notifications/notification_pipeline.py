@@ -3,11 +3,15 @@
 """
 
 from typing import Dict, List, Any, Optional
+import logging
 from .scenario_integration import ScenarioIntegration
-from .notification_ai import NotificationAI
+from .notification_ai import NotificationAI, PRIORITY_RANK
 from .message_templates import MessageTemplates
 
 
+logger = logging.getLogger(__name__)
+
+
 class NotificationPipeline:
     """Основной пайплайн для обработки уведомлений"""
     
@@ -49,12 +53,15 @@ class NotificationPipeline:
                 
                 notifications.append(notification)
                 
-            except Exception as e:
-                print(f"Ошибка генерации уведомления: {e}")
+            except Exception:
+                logger.exception("Ошибка генерации уведомления")
                 continue
         
-        # Сортируем по приоритету и скорингу
-        notifications.sort(key=lambda x: (x.get('priority', 'low'), x.get('analysis_score', 0)), reverse=True)
+        # Сортируем по приоритету (числовой ранг) и скорингу
+        notifications.sort(
+            key=lambda x: (PRIORITY_RANK.get(x.get('priority', 'low'), 0), x.get('analysis_score', 0)),
+            reverse=True
+        )
         
         return notifications
     
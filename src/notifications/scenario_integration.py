@@ -4,10 +4,14 @@
 
 from typing import Dict, List, Any, Optional
 from datetime import datetime
+import logging
 from .notification_ai import NotificationAI
 from .message_templates import MessageTemplates
 
 
+logger = logging.getLogger(__name__)
+
+
 class ScenarioIntegration:
     """Интеграция данных из сценариев продуктов с уведомлениями"""
     
@@ -30,37 +34,29 @@ class ScenarioIntegration:
             Персонализированное уведомление
         """
         try:
-            print(f"💬 Генерируем уведомление для продукта: {product_name}")
-            
             client_info = client_data.get('client_info', {})
             client_name = client_info.get('name', 'Клиент')
-            print(f"👤 Имя клиента: {client_name}")
             
             # Извлекаем данные из сценария
             score = scenario_result.get('score', 0)
             reasons = scenario_result.get('reasons', [])
             expected_benefit = scenario_result.get('expected_benefit', 0)
-            print(f"📊 Скор: {score}, причины: {len(reasons)}, выгода: {expected_benefit}")
             
             # Определяем тип продукта
             product_type = self._map_product_to_type(product_name)
-            print(f"🏷️ Тип продукта: {product_type}")
+            logger.debug("Генерация уведомления %s: скор %s, причин %d, выгода %s",
+                         product_type, score, len(reasons), expected_benefit)
             
             # Генерируем персонализированное сообщение
-            print(f"🔧 Начинаем генерацию сообщения для {product_type}")
             message = self._generate_personalized_message(
                 client_name, product_type, client_data, 
                 scenario_result, expected_benefit
             )
-            print(f"💬 Сообщение сгенерировано: {message[:50]}...")
             
             # Валидируем сообщение
-            print(f"🔧 Начинаем валидацию сообщения")
             validated_message = self._validate_message(message)
-            print(f"✅ Сообщение валидировано: {len(validated_message)} символов")
             
             # Создаем результат
-            print(f"🔧 Создаем результат уведомления")
             result = {
                 'message': validated_message,
                 'product_type': product_type,
@@ -74,15 +70,10 @@ class ScenarioIntegration:
                 'channels': self._get_recommended_channels(client_info),
                 'personalization': self._get_personalization_level(reasons)
             }
-            print(f"✅ Результат уведомления создан: {list(result.keys())}")
             return result
             
-        except Exception as e:
-            print(f"❌ Ошибка в generate_notification_from_scenario: {e}")
-            print(f"❌ Тип ошибки: {type(e).__name__}")
-            import traceback
-            print(f"❌ Полный traceback:")
-            traceback.print_exc()
+        except Exception:
+            logger.exception("Ошибка генерации уведомления для продукта %s", product_name)
             raise
     
     def _map_product_to_type(self, product_name: str) -> str:
@@ -138,14 +129,14 @@ class ScenarioIntegration:
         context = self._prepare_context(client_name, product_type, client_data, 
                                       scenario_result, expected_benefit)
         
-        # Заполняем шаблон
+        # Заполняем шаблон (format_map берет контекст как есть, без копирования в kwargs)
         try:
-            message = template.format(**context)
+            message = template.format_map(context)
         except KeyError as e:
             # Если не хватает данных, используем базовый шаблон
             template = self.templates.get_template(product_type, with_amount=False)
             context = self._prepare_basic_context(client_name, product_type)
-            message = template.format(**context)
+            message = template.format_map(context)
         
         return message
     
@@ -3,6 +3,7 @@
 """
 
 from .base_scenario_fixed import BaseProductScenario
+from .client_snapshot import CachingDatabaseManager
 from .accumulation_deposit import AccumulationDepositScenario
 from .cash_credit import CashCreditScenario
 from .credit_card import CreditCardScenario
@@ -16,6 +17,7 @@ from .travel_card_fixed import TravelCardScenario
 
 __all__ = [
     'BaseProductScenario',
+    'CachingDatabaseManager',
     'AccumulationDepositScenario',
     'CashCreditScenario',
     'CreditCardScenario',
@@ -10,6 +10,8 @@ from .base_scenario_fixed import BaseProductScenario
 class AccumulationDepositScenario(BaseProductScenario):
     """Сценарий для накопительного депозита"""
     
+    analysis_state_attrs = ('accumulation_data',)
+    
     def __init__(self):
         super().__init__()
         self.product_name = "Депозит Накопительный"
@@ -4,11 +4,40 @@
 
 from abc import ABC, abstractmethod
 from typing import Dict, List, Any, Optional
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+# Транзакции клиента за период (параметры: client_code, days)
+TRANSACTIONS_PERIOD_QUERY = """
+        SELECT t.*, c.name as client_name
+        FROM "Transactions" t
+        JOIN "Clients" c ON t.client_code = c.client_code
+        WHERE t.client_code = %s
+        AND t.date >= CURRENT_DATE - %s * INTERVAL '1 day'
+        ORDER BY t.date DESC
+        """
+
+# Переводы клиента за период (параметры: client_code, days)
+TRANSFERS_PERIOD_QUERY = """
+        SELECT tr.*, c.name as client_name
+        FROM "Transfers" tr
+        JOIN "Clients" c ON tr.client_code = c.client_code
+        WHERE tr.client_code = %s
+        AND tr.date >= CURRENT_DATE - %s * INTERVAL '1 day'
+        ORDER BY tr.date DESC
+        """
 
 
 class BaseProductScenario(ABC):
     """Базовый класс для всех сценариев продуктов"""
     
+    # Атрибуты, в которые сценарий сохраняет промежуточные данные анализа
+    # клиента (например, travel_data); очищаются методом reset()
+    analysis_state_attrs: tuple = ()
+    
     def __init__(self):
         self.product_name = ""
         self.category = ""
@@ -17,6 +46,21 @@ class BaseProductScenario(ABC):
         self.conditions = {}
         self.benefits = {}
     
+    def reset(self):
+        """Сбросить данные анализа предыдущего клиента перед повторным использованием"""
+        for attr in self.analysis_state_attrs:
+            self.__dict__.pop(attr, None)
+    
+    def is_applicable(self, client_info: Dict) -> bool:
+        """
+        Быстрая проверка до анализа: имеет ли смысл запускать сценарий
+        
+        Вызывается с уже загруженными данными клиента, без запросов к БД.
+        По умолчанию отсекает только неизвестного клиента; сценарии могут
+        добавить свои заведомые условия отказа.
+        """
+        return bool(client_info)
+    
     @abstractmethod
     def analyze_client(self, client_code: str, days: int, db_manager) -> Dict[str, Any]:
         """
@@ -34,24 +78,20 @@ class BaseProductScenario(ABC):
     
     def get_client_data(self, client_code: str, days: int, db_manager) -> Dict[str, Any]:
         """Получить данные клиента для анализа"""
-        print(f"🔍 Получаем данные клиента {client_code} за {days} дней")
-        
         # Получаем информацию о клиенте
         client_info = db_manager.get_client_by_code(client_code)
-        print(f"👤 Информация о клиенте: {bool(client_info)}")
         if not client_info:
-            print("❌ Клиент не найден в БД")
+            logger.debug("Клиент %s не найден в БД", client_code)
             return {}
         
-        print(f"👤 Клиент: {client_info.get('name', 'Unknown')}, баланс: {client_info.get('avg_monthly_balance_KZT', 0)}")
-        
         # Получаем транзакции
         transactions = self._get_transactions_period(client_code, days, db_manager)
-        print(f"💳 Транзакций получено: {len(transactions)}")
         
         # Получаем переводы
         transfers = self._get_transfers_period(client_code, days, db_manager)
-        print(f"💸 Переводов получено: {len(transfers)}")
+        
+        logger.debug("Данные клиента %s за %s дней: %d транзакций, %d переводов",
+                     client_code, days, len(transactions), len(transfers))
         
         return {
             'client_info': client_info,
@@ -62,38 +102,20 @@ class BaseProductScenario(ABC):
     
     def _get_transactions_period(self, client_code: str, days: int, db_manager) -> List[Dict]:
         """Получить транзакции за период"""
-        query = """
-        SELECT t.*, c.name as client_name
-        FROM "Transactions" t
-        JOIN "Clients" c ON t.client_code = c.client_code
-        WHERE t.client_code = %s
-        AND t.date >= CURRENT_DATE - INTERVAL '%s days'
-        ORDER BY t.date DESC
-        """
-        
         try:
-            result = db_manager.execute_query(query, (client_code, days))
+            result = db_manager.execute_query(TRANSACTIONS_PERIOD_QUERY, (client_code, days))
             return result if result else []
-        except Exception as e:
-            print(f"Ошибка получения транзакций: {e}")
+        except Exception:
+            logger.exception("Ошибка получения транзакций клиента %s", client_code)
             return []
     
     def _get_transfers_period(self, client_code: str, days: int, db_manager) -> List[Dict]:
         """Получить переводы за период"""
-        query = """
-        SELECT tr.*, c.name as client_name
-        FROM "Transfers" tr
-        JOIN "Clients" c ON tr.client_code = c.client_code
-        WHERE tr.client_code = %s
-        AND tr.date >= CURRENT_DATE - INTERVAL '%s days'
-        ORDER BY tr.date DESC
-        """
-        
         try:
-            result = db_manager.execute_query(query, (client_code, days))
+            result = db_manager.execute_query(TRANSFERS_PERIOD_QUERY, (client_code, days))
             return result if result else []
-        except Exception as e:
-            print(f"Ошибка получения переводов: {e}")
+        except Exception:
+            logger.exception("Ошибка получения переводов клиента %s", client_code)
             return []
     
     def calculate_basic_score(self, client_data: Dict) -> float:
@@ -10,6 +10,8 @@ from .base_scenario_fixed import BaseProductScenario
 class CashCreditScenario(BaseProductScenario):
     """Сценарий для кредита наличными"""
     
+    analysis_state_attrs = ('credit_activity_data',)
+    
     def __init__(self):
         super().__init__()
         self.product_name = "Кредит наличными"
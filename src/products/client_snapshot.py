@@ -0,0 +1,123 @@
+"""
+Снимок данных клиента на время одного анализа
+"""
+
+from typing import Dict, List, Any, Callable
+import threading
+
+from .base_scenario_fixed import TRANSACTIONS_PERIOD_QUERY, TRANSFERS_PERIOD_QUERY
+
+
+class CachingDatabaseManager:
+    """
+    Кеширующая обертка менеджера БД на время анализа одного клиента
+    
+    Все сценарии запрашивают одни и те же данные клиента, транзакции
+    и переводы (каждый сценарий дважды, через get_client_data).
+    Обертка выполняет каждый запрос один раз, повторные вызовы
+    получают сохраненный результат. Результаты только для чтения.
+    """
+    
+    def __init__(self, db_manager):
+        self._db_manager = db_manager
+        self._results: Dict[Any, Any] = {}
+        self._lock = threading.Lock()
+        self._key_locks: Dict[Any, threading.Lock] = {}
+    
+    def __getattr__(self, name: str):
+        return getattr(self._db_manager, name)
+    
+    def _source(self):
+        """Менеджер, которым выполняются запросы при промахе кеша"""
+        return self._db_manager
+    
+    def _cached(self, key, load: Callable[[], Any]) -> Any:
+        """Результат по ключу (параллельные сценарии ждут первый запрос)"""
+        try:
+            return self._results[key]
+        except KeyError:
+            pass
+        
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        
+        # Разные ключи загружаются параллельно, одинаковые - один раз
+        with key_lock:
+            try:
+                return self._results[key]
+            except KeyError:
+                result = self._results[key] = load()
+                return result
+    
+    def prefetch(self, client_code: str, days: int):
+        """
+        Загрузить данные клиента для всех сценариев одним запросом
+        
+        Результат раскладывается по ключам запросов сценариев
+        (get_client_by_code и запросы транзакций/переводов за период).
+        Менеджеры без fetch_client_bundle (мок) и ошибки запроса
+        оставляют обычную загрузку по запросам.
+        """
+        fetch_bundle = getattr(self._db_manager, 'fetch_client_bundle', None)
+        bundle = fetch_bundle(client_code, days) if fetch_bundle else None
+        if bundle is None:
+            return
+        
+        client_info, transactions, transfers = bundle
+        params = (client_code, days)
+        with self._lock:
+            self._results[('client', str(client_code))] = client_info
+            self._results[(TRANSACTIONS_PERIOD_QUERY, params)] = transactions
+            self._results[(TRANSFERS_PERIOD_QUERY, params)] = transfers
+    
+    def acquire_worker(self) -> '_SnapshotWorker':
+        """
+        Менеджер для параллельной задачи
+        
+        Задачи разделяют кеш снимка, а при промахе кеша запрос выполняется
+        через менеджер, выданный задаче оборачиваемым менеджером
+        (у RealDatabaseManager - собственное соединение).
+        """
+        return _SnapshotWorker(self)
+    
+    def release_worker(self, worker: '_SnapshotWorker'):
+        """Освободить менеджер параллельной задачи"""
+        worker.release()
+    
+    def get_client_by_code(self, client_code: str) -> Dict:
+        """Получить данные клиента (один запрос на анализ)"""
+        return self._cached(
+            ('client', str(client_code)),
+            lambda: self._source().get_client_by_code(client_code)
+        )
+    
+    def execute_query(self, query: str, params: tuple) -> List[Dict]:
+        """Выполнить SQL запрос (одинаковые запросы выполняются один раз)"""
+        return self._cached(
+            (query, params),
+            lambda: self._source().execute_query(query, params)
+        )
+
+
+class _SnapshotWorker(CachingDatabaseManager):
+    """Снимок для параллельной задачи: общий кеш, свой менеджер при промахе"""
+    
+    def __init__(self, snapshot: CachingDatabaseManager):
+        self._db_manager = snapshot._db_manager
+        self._results = snapshot._results
+        self._lock = snapshot._lock
+        self._key_locks = snapshot._key_locks
+        self._worker = None
+    
+    def _source(self):
+        """Менеджер задачи (запрашивается при первом промахе кеша)"""
+        if self._worker is None:
+            acquire = getattr(self._db_manager, 'acquire_worker', None)
+            self._worker = acquire() if acquire else self._db_manager
+        return self._worker
+    
+    def release(self):
+        """Вернуть менеджер задачи оборачиваемому менеджеру"""
+        worker, self._worker = self._worker, None
+        if worker is not None and worker is not self._db_manager:
+            self._db_manager.release_worker(worker)
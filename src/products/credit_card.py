@@ -10,6 +10,8 @@ from .base_scenario_fixed import BaseProductScenario
 class CreditCardScenario(BaseProductScenario):
     """Сценарий для кредитной карты"""
     
+    analysis_state_attrs = ('online_spending_data',)
+    
     def __init__(self):
         super().__init__()
         self.product_name = "Кредитная карта"
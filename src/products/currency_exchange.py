@@ -10,6 +10,8 @@ from .base_scenario_fixed import BaseProductScenario
 class CurrencyExchangeScenario(BaseProductScenario):
     """Сценарий для обмена валют"""
     
+    analysis_state_attrs = ('fx_data',)
+    
     def __init__(self):
         super().__init__()
         self.product_name = "Обмен валют"
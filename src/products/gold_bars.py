@@ -10,6 +10,8 @@ from .base_scenario_fixed import BaseProductScenario
 class GoldBarsScenario(BaseProductScenario):
     """Сценарий для золотых слитков"""
     
+    analysis_state_attrs = ('diversification_data',)
+    
     def __init__(self):
         super().__init__()
         self.product_name = "Золотые слитки"
@@ -10,6 +10,8 @@ from .base_scenario_fixed import BaseProductScenario
 class MultiCurrencyDepositScenario(BaseProductScenario):
     """Сценарий для мультивалютного депозита"""
     
+    analysis_state_attrs = ('currency_activity_data',)
+    
     def __init__(self):
         super().__init__()
         self.product_name = "Депозит Мультивалютный"
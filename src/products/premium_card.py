@@ -10,6 +10,8 @@ from .base_scenario_fixed import BaseProductScenario
 class PremiumCardScenario(BaseProductScenario):
     """Сценарий для премиальной карты"""
     
+    analysis_state_attrs = ('premium_spending_data',)
+    
     def __init__(self):
         super().__init__()
         self.product_name = "Премиальная карта"
@@ -0,0 +1,53 @@
+"""
+Реестр сценариев продуктов
+"""
+
+from typing import Dict
+import threading
+
+from .base_scenario_fixed import BaseProductScenario
+from .accumulation_deposit import AccumulationDepositScenario
+from .cash_credit import CashCreditScenario
+from .credit_card import CreditCardScenario
+from .currency_exchange import CurrencyExchangeScenario
+from .gold_bars import GoldBarsScenario
+from .investments import InvestmentsScenario
+from .multi_currency_deposit import MultiCurrencyDepositScenario
+from .premium_card import PremiumCardScenario
+from .savings_deposit import SavingsDepositScenario
+from .travel_card_fixed import TravelCardScenario
+
+
+# Сценарии всех продуктов в порядке анализа
+SCENARIO_CLASSES = {
+    'travel_card': TravelCardScenario,
+    'premium_card': PremiumCardScenario,
+    'credit_card': CreditCardScenario,
+    'currency_exchange': CurrencyExchangeScenario,
+    'multi_currency_deposit': MultiCurrencyDepositScenario,
+    'savings_deposit': SavingsDepositScenario,
+    'accumulation_deposit': AccumulationDepositScenario,
+    'investments': InvestmentsScenario,
+    'gold_bars': GoldBarsScenario,
+    'cash_credit': CashCreditScenario
+}
+
+# Порядок запуска сценариев (кортеж ключей, без обхода словаря на каждый запрос)
+SCENARIO_KEYS = tuple(SCENARIO_CLASSES)
+
+_local = threading.local()
+
+
+def get_scenarios() -> Dict[str, BaseProductScenario]:
+    """
+    Экземпляры сценариев для текущего потока
+    
+    Сценарии создаются один раз на поток и переиспользуются между запросами.
+    Между потоками они не разделяются, так как сохраняют промежуточные данные
+    анализа клиента в атрибутах экземпляра (см. BaseProductScenario.reset).
+    """
+    scenarios = getattr(_local, 'scenarios', None)
+    if scenarios is None:
+        scenarios = {key: scenario_cls() for key, scenario_cls in SCENARIO_CLASSES.items()}
+        _local.scenarios = scenarios
+    return scenarios
@@ -10,6 +10,8 @@ from .base_scenario_fixed import BaseProductScenario
 class SavingsDepositScenario(BaseProductScenario):
     """Сценарий для сберегательного депозита"""
     
+    analysis_state_attrs = ('balance_stability_data',)
+    
     def __init__(self):
         super().__init__()
         self.product_name = "Депозит Сберегательный"
@@ -0,0 +1,397 @@
+"""
+Тесты для слоя API
+"""
+
+import unittest
+from unittest.mock import Mock, MagicMock, patch
+import csv
+import gzip
+import io
+import json
+import sys
+import os
+import threading
+
+# Модули используют относительные импорты внутри src, поэтому путь - корень репозитория
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import msgspec
+
+from src.api import analyzer, database_managers, notification_api
+from src.api.analyzer import PartialAnalysis
+from src.api.database_managers import MockDatabaseManager, RealDatabaseManager
+from src.api.notification_api import app, csv_field, iter_csv, payload_cache
+from src.api.schemas import decode_analyze_request
+
+
+CLIENT = {
+    'client_code': 1,
+    'name': 'Рамазан',
+    'status': 'Зарплатный клиент',
+    'avg_monthly_balance_KZT': 2400000
+}
+
+
+def make_cursor(rows):
+    """Курсор, возвращающий строки rows по очереди из fetchone()"""
+    cursor = MagicMock()
+    cursor.__enter__.return_value = cursor
+    cursor.fetchone.side_effect = list(rows)
+    return cursor
+
+
+class TestMockDatabaseManager(unittest.TestCase):
+    """Тесты мок-менеджера базы данных"""
+    
+    def test_string_client_code(self):
+        """Тест: нечисловой код клиента (client_code в БД - VARCHAR)"""
+        db_manager = MockDatabaseManager({'client_code': 'C-001'}, [], [])
+        
+        self.assertEqual(db_manager.get_client_by_code('C-001'), {'client_code': 'C-001'})
+        self.assertEqual(db_manager.get_client_by_code('C-002'), {})
+    
+    def test_numeric_client_code(self):
+        """Тест: числовой код совпадает со строковым"""
+        db_manager = MockDatabaseManager({'client_code': 1}, [], [])
+        
+        self.assertEqual(db_manager.get_client_by_code('1'), {'client_code': 1})
+
+
+
+class TestAnalyzeRequest(unittest.TestCase):
+    """Тесты разбора и валидации тела запроса"""
+    
+    def setUp(self):
+        """Настройка тестов"""
+        self.client = app.test_client()
+    
+    def test_optional_row_fields(self):
+        """Тест: поля транзакций и переводов необязательны"""
+        raw = msgspec.json.encode({
+            **CLIENT,
+            'transactions': [{'category': 'Такси', 'amount': 1000}],
+            'transfers': [{'type': 'salary_in', 'amount': 300000}]
+        })
+        
+        req = decode_analyze_request(raw)
+        
+        self.assertEqual(req.transactions, [{'category': 'Такси', 'amount': 1000}])
+        self.assertEqual(req.city, 'Алматы')
+        self.assertEqual(req.age, 30)
+    
+    def test_null_city_and_age(self):
+        """Тест: null в city и age принимается, как до валидации схемой"""
+        raw = msgspec.json.encode({**CLIENT, 'city': None, 'age': None})
+        
+        req = decode_analyze_request(raw)
+        
+        self.assertIsNone(req.client_info()['city'])
+        self.assertIsNone(req.client_info()['age'])
+    
+    def test_invalid_type(self):
+        """Тест: неверный тип поля"""
+        raw = msgspec.json.encode({**CLIENT, 'avg_monthly_balance_KZT': 'много'})
+        
+        with self.assertRaises(msgspec.ValidationError):
+            decode_analyze_request(raw)
+    
+    def test_empty_body_400(self):
+        """Тест: пустое тело запроса - 400"""
+        response = self.client.post('/api/v1/analyze', data=b'', content_type='application/json')
+        
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.get_json()['error'], 'Отсутствуют данные')
+    
+    def test_missing_field_400(self):
+        """Тест: отсутствует обязательное поле клиента - 400"""
+        body = {key: value for key, value in CLIENT.items() if key != 'name'}
+        
+        response = self.client.post('/api/v1/analyze/all', json=body)
+        
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Некорректные данные', response.get_json()['error'])
+
+
+
+class TestAnalyzer(unittest.TestCase):
+    """Тесты анализатора сценариев"""
+    
+    def make_db_manager(self, balance, transactions):
+        """Мок-менеджер клиента с заданным балансом и транзакциями"""
+        transfers = [
+            {'date': '2025-08-01', 'type': 'salary_in', 'direction': 'in', 'amount': 320000, 'currency': 'KZT'}
+        ]
+        client_info = dict(CLIENT, avg_monthly_balance_KZT=balance, city='Алматы', age=30)
+        return MockDatabaseManager(client_info, transactions, transfers)
+    
+    def run_all_scenarios(self, db_manager):
+        """Уведомления всех сценариев без предварительного отбора (эталон)"""
+        snapshot = analyzer.CachingDatabaseManager(db_manager)
+        notifications = [
+            analyzer._run_scenario(key, '1', 90, snapshot, analyzer.get_integration())
+            for key in analyzer.SCENARIO_KEYS
+        ]
+        return sorted(notifications, key=analyzer._sort_key, reverse=True)
+    
+    def test_low_balance_keeps_all_products(self):
+        """Тест: предварительный отбор не убирает продукты клиента с малым балансом"""
+        transactions = [
+            {'date': '2025-08-12', 'category': 'Продукты питания', 'amount': 44000, 'currency': 'KZT'}
+        ]
+        db_manager = self.make_db_manager(50000, transactions)
+        
+        notifications = analyzer.analyze_client_with_scenarios('1', 90, db_manager)
+        expected = self.run_all_scenarios(db_manager)
+        
+        self.assertEqual(len(notifications), len(analyzer.SCENARIO_KEYS))
+        self.assertEqual(
+            [(n['product_key'], n['analysis_score']) for n in notifications],
+            [(n['product_key'], n['analysis_score']) for n in expected]
+        )
+    
+    def test_unknown_client(self):
+        """Тест: неизвестный клиент - пустой результат без запуска сценариев"""
+        db_manager = Mock(spec=['get_client_by_code', 'execute_query'])
+        db_manager.get_client_by_code.return_value = None
+        
+        self.assertEqual(analyzer.analyze_client_with_scenarios('404', 90, db_manager), [])
+        self.assertEqual(analyzer.analyze_client_fast('404', 90, db_manager), [])
+        db_manager.execute_query.assert_not_called()
+    
+    def test_sorted_by_priority_rank(self):
+        """Тест: уведомления отсортированы по рангу приоритета, затем по скору"""
+        transactions = [
+            {'date': '2025-08-10', 'category': 'Такси', 'amount': 27400, 'currency': 'KZT'},
+            {'date': '2025-08-15', 'category': 'Отели', 'amount': 150000, 'currency': 'USD'}
+        ]
+        db_manager = self.make_db_manager(CLIENT['avg_monthly_balance_KZT'], transactions)
+        
+        notifications = analyzer.analyze_client_with_scenarios('1', 90, db_manager)
+        keys = [n['_sort_key'] for n in notifications]
+        
+        self.assertTrue(notifications)
+        self.assertEqual(keys, sorted(keys, reverse=True))
+    
+    def test_timeout_returns_partial(self):
+        """Тест: сценарий, не уложившийся в таймаут, дает частичный результат"""
+        transactions = [
+            {'date': '2025-08-10', 'category': 'Такси', 'amount': 27400, 'currency': 'KZT'},
+            {'date': '2025-08-15', 'category': 'Отели', 'amount': 150000, 'currency': 'USD'}
+        ]
+        db_manager = self.make_db_manager(CLIENT['avg_monthly_balance_KZT'], transactions)
+        release = threading.Event()
+        run_scenario = analyzer._run_scenario
+        
+        def slow_scenario(product_key, *args):
+            if product_key == 'travel_card':
+                release.wait(5)
+            return run_scenario(product_key, *args)
+        
+        try:
+            with patch.object(analyzer, 'ANALYSIS_TIMEOUT', 0.2), \
+                    patch.object(analyzer, '_run_scenario', slow_scenario):
+                notifications = analyzer.analyze_client_with_scenarios('1', 90, db_manager)
+        finally:
+            release.set()
+        
+        self.assertIsInstance(notifications, PartialAnalysis)
+        self.assertNotIn('travel_card', [n['product_key'] for n in notifications])
+        self.assertTrue(notifications)
+
+
+
+class TestStreamedCompression(unittest.TestCase):
+    """Тесты сжатия потоковых ответов"""
+    
+    def setUp(self):
+        """Настройка тестов"""
+        payload_cache.clear()
+        self.client = app.test_client()
+        self.notifications = [{
+            'product_name': 'Кредитная карта',
+            'message': 'Текст уведомления ' * 20,
+            'score': 0.7,
+            'expected_benefit': 1000,
+            'priority': 'medium'
+        }] * 4
+    
+    def tearDown(self):
+        """Очистка кеша после тестов"""
+        payload_cache.clear()
+    
+    def post_analyze_all(self, headers):
+        """Запрос /analyze/all с заданными заголовками"""
+        with patch.object(notification_api, 'analyze_client', return_value=self.notifications):
+            return self.client.post('/api/v1/analyze/all', json=CLIENT, headers=headers)
+    
+    def test_gzip_stream(self):
+        """Тест: поток сжимается gzip, если клиент его принимает"""
+        response = self.post_analyze_all({'Accept-Encoding': 'gzip'})
+        
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        data = json.loads(gzip.decompress(response.data))
+        self.assertEqual(data['client_code'], 1)
+        self.assertEqual(len(data['recommendations']), 4)
+    
+    def test_plain_stream(self):
+        """Тест: без Accept-Encoding поток отдается без сжатия"""
+        response = self.post_analyze_all({})
+        
+        self.assertNotIn('Content-Encoding', response.headers)
+        self.assertEqual(len(response.get_json()['recommendations']), 4)
+
+
+class TestCsvSerialization(unittest.TestCase):
+    """Тесты потоковой сериализации CSV"""
+    
+    def test_matches_csv_writer(self):
+        """Тест: формат совпадает с csv.writer"""
+        rows = [
+            ('client_code', 'product', 'push_notification'),
+            (1, 'Кредитная карта', 'Кешбэк до 10%, без переплат'),
+            (2, 'Депозит "Сберегательный"', 'Строка\nс переносом'),
+            (3, None, '')
+        ]
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        
+        self.assertEqual(''.join(iter_csv(rows)), buffer.getvalue())
+    
+    def test_csv_field_quoting(self):
+        """Тест: кавычки только при необходимости"""
+        self.assertEqual(csv_field('text'), 'text')
+        self.assertEqual(csv_field(12.5), '12.5')
+        self.assertEqual(csv_field(None), '')
+        self.assertEqual(csv_field('a,b'), '"a,b"')
+        self.assertEqual(csv_field('say "hi"'), '"say ""hi"""')
+
+
+class TestAnalysisCache(unittest.TestCase):
+    """Тесты кеша результатов анализа"""
+    
+    def setUp(self):
+        """Настройка тестов"""
+        payload_cache.clear()
+        self.client = app.test_client()
+        self.notifications = [{'product_name': 'Кредитная карта', 'message': 'Текст уведомления'}]
+    
+    def tearDown(self):
+        """Очистка кеша после тестов"""
+        payload_cache.clear()
+    
+    def test_repeated_request_cached(self):
+        """Тест: повторный запрос отдается из кеша"""
+        with patch.object(notification_api, 'analyze_client', return_value=self.notifications) as analyze:
+            first = self.client.post('/api/v1/analyze', json=CLIENT)
+            second = self.client.post('/api/v1/analyze', json=CLIENT)
+        
+        self.assertEqual(analyze.call_count, 1)
+        self.assertEqual(first.get_json(), second.get_json())
+    
+    def test_no_cache_bypass(self):
+        """Тест: Cache-Control: no-cache запускает анализ заново"""
+        with patch.object(notification_api, 'analyze_client', return_value=self.notifications) as analyze:
+            self.client.post('/api/v1/analyze', json=CLIENT)
+            self.client.post('/api/v1/analyze', json=CLIENT, headers={'Cache-Control': 'no-cache'})
+        
+        self.assertEqual(analyze.call_count, 2)
+    
+    def test_partial_result_not_cached(self):
+        """Тест: результат с таймаутом сценария не кешируется"""
+        partial = PartialAnalysis(self.notifications)
+        with patch.object(notification_api, 'analyze_client', return_value=partial) as analyze:
+            self.client.post('/api/v1/analyze', json=CLIENT)
+            self.client.post('/api/v1/analyze', json=CLIENT)
+        
+        self.assertEqual(analyze.call_count, 2)
+
+
+class TestRandomClient(unittest.TestCase):
+    """Тесты выбора случайного клиента"""
+    
+    def setUp(self):
+        """Настройка тестов"""
+        database_managers._client_id_range = None
+        self.db_manager = RealDatabaseManager.__new__(RealDatabaseManager)
+        self.db_manager._pooled = True
+        self.db_manager.connection = Mock()
+    
+    def tearDown(self):
+        """Сброс кешированных границ id"""
+        database_managers._client_id_range = None
+    
+    def test_random_id_probe(self):
+        """Тест: клиент выбирается по случайному id в границах таблицы"""
+        cursor = make_cursor([(10, 20), (1005,)])
+        self.db_manager.connection.cursor.return_value = cursor
+        
+        with patch.object(database_managers.random, 'randint', return_value=15) as randint:
+            client_code = self.db_manager.get_random_client_code()
+        
+        self.assertEqual(client_code, '1005')
+        randint.assert_called_once_with(10, 20)
+        self.assertEqual(cursor.execute.call_args_list[1].args[1], (15,))
+    
+    def test_stale_range_fallback(self):
+        """Тест: при устаревших границах берется первый клиент"""
+        cursor = make_cursor([(10, 20), None, (1001,)])
+        self.db_manager.connection.cursor.return_value = cursor
+        
+        self.assertEqual(self.db_manager.get_random_client_code(), '1001')
+    
+    def test_empty_table(self):
+        """Тест: пустая таблица клиентов"""
+        self.db_manager.connection.cursor.return_value = make_cursor([(None, None)])
+        
+        self.assertIsNone(self.db_manager.get_random_client_code())
+
+
+class TestDatabaseStatus(unittest.TestCase):
+    """Тесты /test/db-status"""
+    
+    def setUp(self):
+        """Настройка тестов"""
+        self.client = app.test_client()
+    
+    def request_status(self, rows, query_string=None):
+        """Запрос статуса БД с курсором, возвращающим rows"""
+        cursor = make_cursor(rows)
+        db_manager = MagicMock()
+        db_manager.__enter__.return_value = db_manager
+        db_manager.connection.cursor.return_value = cursor
+        
+        with patch.object(notification_api, 'RealDatabaseManager', return_value=db_manager):
+            response = self.client.get('/api/v1/test/db-status', query_string=query_string)
+        return response, cursor
+    
+    def test_exact_counts(self):
+        """Тест: по умолчанию считаются точные количества"""
+        response, cursor = self.request_status([(3, 30, 20)])
+        data = response.get_json()
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(data['estimated'])
+        self.assertEqual(data['transactions_count'], 30)
+        cursor.execute.assert_called_once_with(notification_api.DB_STATUS_QUERY)
+    
+    def test_estimate(self):
+        """Тест: оценка по статистике планировщика"""
+        response, cursor = self.request_status([(3, 30, 20)], {'estimate': '1'})
+        data = response.get_json()
+        
+        self.assertTrue(data['estimated'])
+        self.assertEqual(data['clients_count'], 3)
+        cursor.execute.assert_called_once_with(notification_api.DB_STATUS_ESTIMATE_QUERY)
+    
+    def test_estimate_without_statistics(self):
+        """Тест: без статистики (-1) выполняется точный подсчет"""
+        response, cursor = self.request_status([(-1, 30, 20), (3, 31, 20)], {'estimate': '1'})
+        data = response.get_json()
+        
+        self.assertFalse(data['estimated'])
+        self.assertEqual(data['transactions_count'], 31)
+        self.assertEqual(cursor.execute.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
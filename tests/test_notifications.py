@@ -0,0 +1,169 @@
+"""
+Тесты для слоя уведомлений и сценариев продуктов
+"""
+
+import unittest
+from unittest.mock import Mock
+import sys
+import os
+
+# Модули используют относительные импорты внутри src, поэтому путь - корень репозитория
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.notifications.notification_generator import NotificationGenerator
+from src.notifications.notification_pipeline import NotificationPipeline
+from src.products import CreditCardScenario, GoldBarsScenario, TravelCardScenario
+from src.products.base_scenario_fixed import TRANSACTIONS_PERIOD_QUERY, TRANSFERS_PERIOD_QUERY
+from src.products.client_snapshot import CachingDatabaseManager
+
+
+class TestScenarioApplicability(unittest.TestCase):
+    """Тесты быстрой проверки применимости сценариев"""
+    
+    def test_unknown_client(self):
+        """Тест: неизвестный клиент не подходит ни одному сценарию"""
+        self.assertFalse(CreditCardScenario().is_applicable({}))
+        self.assertFalse(CreditCardScenario().is_applicable(None))
+    
+    def test_low_balance_client(self):
+        """Тест: малый баланс снижает скор в анализе, но не отсекает сценарий"""
+        client_info = {'client_code': 1, 'avg_monthly_balance_KZT': 50000}
+        
+        self.assertTrue(GoldBarsScenario().is_applicable(client_info))
+        self.assertTrue(TravelCardScenario().is_applicable(client_info))
+
+
+
+class TestNotificationGeneratorOrder(unittest.TestCase):
+    """Тесты сортировки уведомлений NotificationGenerator"""
+    
+    def setUp(self):
+        """Настройка тестов"""
+        self.generator = NotificationGenerator()
+        self.generator.ai = Mock()
+        self.generator.ai.generate_notification.side_effect = (
+            lambda client_data, product, match_score: {'priority': match_score['priority']}
+        )
+    
+    def generate(self, items):
+        """Уведомления для рекомендаций (имя продукта, приоритет, скор)"""
+        recommendations = {
+            'client_code': 1,
+            'client_info': {'name': 'Рамазан'},
+            'recommendations': [
+                {'product': {'id': name, 'name': name}, 'match_score': {'priority': priority, 'score': score}}
+                for name, priority, score in items
+            ]
+        }
+        notifications = self.generator.generate_recommendation_notifications(recommendations)
+        return [n['product_name'] for n in notifications]
+    
+    def test_priority_rank_before_score(self):
+        """Тест: high выше medium и low независимо от скора (не по алфавиту)"""
+        order = self.generate([('low', 'low', 0.9), ('high', 'high', 0.2), ('medium', 'medium', 0.5)])
+        
+        self.assertEqual(order, ['high', 'medium', 'low'])
+    
+    def test_score_within_priority(self):
+        """Тест: внутри одного приоритета выше скор"""
+        order = self.generate([('a', 'medium', 0.4), ('b', 'medium', 0.8), ('c', 'high', 0.1)])
+        
+        self.assertEqual(order, ['c', 'b', 'a'])
+
+
+
+class TestNotificationPipelineOrder(unittest.TestCase):
+    """Тесты сортировки уведомлений NotificationPipeline"""
+    
+    def setUp(self):
+        """Настройка тестов"""
+        self.pipeline = NotificationPipeline()
+        self.pipeline.scenario_integration = Mock()
+        self.pipeline.scenario_integration.generate_notification_from_scenario.side_effect = (
+            lambda client_data, scenario_result, product_name: {'priority': scenario_result['priority']}
+        )
+    
+    def test_priority_rank_before_score(self):
+        """Тест: high выше medium и low независимо от скора (не по алфавиту)"""
+        scenario_results = [
+            {'product_key': 'low', 'priority': 'low', 'score': 0.9},
+            {'product_key': 'high', 'priority': 'high', 'score': 0.5},
+            {'product_key': 'medium', 'priority': 'medium', 'score': 0.7}
+        ]
+        
+        notifications = self.pipeline.process_client_analysis({'client_code': 1}, scenario_results)
+        
+        self.assertEqual([n['product_key'] for n in notifications], ['high', 'medium', 'low'])
+    
+    def test_score_within_priority(self):
+        """Тест: внутри одного приоритета выше скор"""
+        scenario_results = [
+            {'product_key': 'a', 'priority': 'medium', 'score': 0.4},
+            {'product_key': 'b', 'priority': 'medium', 'score': 0.8}
+        ]
+        
+        notifications = self.pipeline.process_client_analysis({'client_code': 1}, scenario_results)
+        
+        self.assertEqual([n['product_key'] for n in notifications], ['b', 'a'])
+
+
+class TestCachingDatabaseManager(unittest.TestCase):
+    """Тесты снимка данных клиента"""
+    
+    def setUp(self):
+        """Настройка тестов"""
+        self.worker_db = Mock()
+        self.worker_db.execute_query.return_value = [{'amount': 1000}]
+        self.mock_db = Mock()
+        self.mock_db.acquire_worker.return_value = self.worker_db
+        self.mock_db.fetch_client_bundle.return_value = ({'client_code': 1}, [{'amount': 10}], [])
+        self.snapshot = CachingDatabaseManager(self.mock_db)
+    
+    def test_prefetch(self):
+        """Тест: данные пакета отдаются без запросов к БД"""
+        self.snapshot.prefetch('1', 90)
+        
+        self.assertEqual(self.snapshot.get_client_by_code('1'), {'client_code': 1})
+        self.assertEqual(self.snapshot.execute_query(TRANSACTIONS_PERIOD_QUERY, ('1', 90)), [{'amount': 10}])
+        self.assertEqual(self.snapshot.execute_query(TRANSFERS_PERIOD_QUERY, ('1', 90)), [])
+        self.mock_db.get_client_by_code.assert_not_called()
+        self.mock_db.execute_query.assert_not_called()
+    
+    def test_worker_without_misses(self):
+        """Тест: задача без промахов кеша не берет соединение"""
+        self.snapshot.prefetch('1', 90)
+        
+        worker = self.snapshot.acquire_worker()
+        worker.get_client_by_code('1')
+        self.snapshot.release_worker(worker)
+        
+        self.mock_db.acquire_worker.assert_not_called()
+        self.mock_db.release_worker.assert_not_called()
+    
+    def test_worker_miss_uses_own_manager(self):
+        """Тест: промах кеша в задаче идет через ее собственный менеджер"""
+        worker = self.snapshot.acquire_worker()
+        result = worker.execute_query('SELECT 1', ())
+        self.snapshot.release_worker(worker)
+        
+        self.assertEqual(result, [{'amount': 1000}])
+        self.worker_db.execute_query.assert_called_once_with('SELECT 1', ())
+        self.mock_db.execute_query.assert_not_called()
+        self.mock_db.release_worker.assert_called_once_with(self.worker_db)
+    
+    def test_workers_share_cache(self):
+        """Тест: одинаковый запрос выполняется один раз на все задачи"""
+        first = self.snapshot.acquire_worker()
+        second = self.snapshot.acquire_worker()
+        
+        first.execute_query('SELECT 1', ())
+        second.execute_query('SELECT 1', ())
+        self.snapshot.release_worker(first)
+        self.snapshot.release_worker(second)
+        
+        self.assertEqual(self.worker_db.execute_query.call_count, 1)
+        self.assertEqual(self.mock_db.acquire_worker.call_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()